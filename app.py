@@ -1,62 +1,239 @@
 import dash
-from dash import dcc, html, Input, Output, State, callback_context
+from dash import dcc, html, Input, Output, State, ClientsideFunction, callback, callback_context, clientside_callback, no_update
 import dash_bootstrap_components as dbc
 import requests
 import os
+import time
+import uuid
 from dotenv import load_dotenv
-import firebase_admin
-from firebase_admin import credentials
-import sqlite3
 import json
-import urllib.parse
+import flask
+import hmac
+from auth_tokens import InvalidToken, TokenVerifier
+from bulk import BulkRunner
+from cache import TTLCache, normalize_query
+from db_operations import store as preference_store, write_queue
+from disk_cache import DiskCache
+from engine import FetchEngine
+from enrichment import VideoEnricher
+from local_index import LocalVideoIndex
+from metrics import CALLBACK_PHASE, registry
+from quota import QuotaAccountant, QuotaExceeded, SQLiteLedger
+from singleflight import SingleFlight
+from suggest import Suggester
+from trending import TrendingFeed
+from warmup import SessionWarmer
+from youtube_client import YouTubeClient
 
 # Load environment variables
 load_dotenv()
 
-if not firebase_admin._apps:
-    cred = credentials.Certificate({
-        "type": "service_account",
-        "project_id": os.getenv("FIREBASE_PROJECT_ID"),
-        "private_key_id": os.getenv("FIREBASE_PRIVATE_KEY_ID"),
-        "private_key": os.getenv("FIREBASE_PRIVATE_KEY", "").replace('\\n', '\n'),
-        "client_email": os.getenv("FIREBASE_CLIENT_EMAIL"),
-        "client_id": os.getenv("FIREBASE_CLIENT_ID"),
-        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-        "token_uri": "https://oauth2.googleapis.com/token",
-        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-        "client_x509_cert_url": os.getenv("FIREBASE_CLIENT_CERT_URL")
-    })
-    try:
-        firebase_admin.initialize_app(cred)
-    except Exception:
-        pass
-
 external_stylesheets = [
     dbc.themes.BOOTSTRAP,
     "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.0/css/all.min.css",
     "https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap",
 ]
-app = dash.Dash(
-    __name__,
-    external_stylesheets=external_stylesheets,
-    suppress_callback_exceptions=True,
-    meta_tags=[{'name': 'viewport', 'content': 'width=device-width, initial-scale=1.0'}]
+# Loaded before everything in assets/, which relies on firebase and window.firebaseConfig
+external_scripts = [
+    "https://www.gstatic.com/firebasejs/8.10.0/firebase-app.js",
+    "https://www.gstatic.com/firebasejs/8.10.0/firebase-auth.js",
+    "/firebase-config.js",
+]
+
+# Shared by every worker process and kept across restarts; L2 behind the in-process caches
+response_cache = DiskCache(max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))))
+
+# Search responses keyed on (normalized query, region, maxResults)
+search_cache = TTLCache(
+    maxsize=int(os.getenv("SEARCH_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", "600")),
+    stale_ttl=float(os.getenv("SEARCH_CACHE_STALE_TTL", "3600")),
+    l2=response_cache,
+    name="search",
 )
-app.title = "YouTube Focus - Distraction Free"
-server = app.server
 
-def init_db():
-    conn = sqlite3.connect('user_preferences.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS users
-                 (user_id TEXT PRIMARY KEY,
-                  dark_mode INTEGER,
-                  search_history TEXT,
-                  created_at TIMESTAMP)''')
-    conn.commit()
-    conn.close()
+# Daily Data API budget (search=100 units, videos=1), shared by all workers via the preferences DB
+quota = QuotaAccountant(
+    daily_budget=int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000")),
+    ledger=SQLiteLedger(preference_store),
+)
+
+UPSTREAM_DEADLINE = float(os.getenv("UPSTREAM_DEADLINE", "15"))
+
+# Attempts and retries stop at the deadline, so a call the engine gave up on frees its slot soon after
+youtube = YouTubeClient(os.getenv("YOUTUBE_API_KEY"), quota=quota, deadline=UPSTREAM_DEADLINE)
+
+# Upstream calls run on one event-loop thread with bounded concurrency and a per-call deadline.
+# Cache lookups stay on the caller's thread; only the loaders below go through it.
+engine = FetchEngine(
+    max_concurrency=int(os.getenv("FETCH_CONCURRENCY", "16")),
+    deadline=UPSTREAM_DEADLINE,
+)
+
+def fetch_search_results(query, region, max_results=20, page_token=None, user=None, speculative=False):
+    # region only partitions the cache; search.list is sent without regionCode, as before
+    # Background revalidation is nobody's request: it is billed as speculative, to no user.
+    q = normalize_query(query)
+
+    def load(user, speculative):
+        return engine.call(lambda: youtube.search(q, max_results=max_results, page_token=page_token,
+                                                  user=user, speculative=speculative))
+
+    return search_cache.get_or_load(
+        (q, region, max_results, page_token),
+        lambda: load(user, speculative),
+        refresh=lambda: load(None, True),
+    )
+
+# Trending pages after the first (the first comes from trending_feed)
+trending_pages = TTLCache(
+    maxsize=int(os.getenv("SEARCH_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("TRENDING_REFRESH_INTERVAL", "300")),
+    stale_ttl=float(os.getenv("SEARCH_CACHE_STALE_TTL", "3600")),
+    l2=response_cache,
+    name="trending_page",
+)
+
+def fetch_trending_page(region, page_token, max_results=20, speculative=False):
+    def load(speculative):
+        return engine.call(lambda: youtube.trending_page(region, page_token, max_results=max_results,
+                                                         speculative=speculative))
+
+    return trending_pages.get_or_load(
+        (region, max_results, page_token),
+        lambda: load(speculative),
+        refresh=lambda: load(True),
+    )
+
+def fetch_page(state, speculative=False):
+    # state is the results-state store; see results_state()
+    if state["mode"] == "trending":
+        return fetch_trending_page(state["region"], state["next"], speculative=speculative)
+    return fetch_search_results(state["query"], state["region"], page_token=state["next"], speculative=speculative)
+
+def prefetch_page(state):
+    data = fetch_page(state, speculative=True)
+    enricher.enrich((video_id(it) for it in data.get("items", [])), speculative=True)
+
+# Page N+1 (and its durations/views) is fetched into the caches while page N is on screen
+def prefetch_next_page(state):
+    if state and state.get("next") and not engine.busy() and quota.allow_speculative():
+        engine.submit(prefetch_page, state)
+
+# Duration/view counts per videoId; these change slowly, so a long TTL is fine
+enricher = VideoEnricher(youtube, TTLCache(
+    maxsize=int(os.getenv("VIDEO_META_CACHE_SIZE", "20000")),
+    ttl=float(os.getenv("VIDEO_META_CACHE_TTL", "3600")),
+), engine=engine)
+
+# On sign-in, the user's last few distinct searches are fetched into the caches in
+# the background, billed as speculative and never to the user's own rate limit
+def warm_search(query):
+    data = fetch_search_results(query, DEFAULT_REGION, 20, None, speculative=True)
+    enricher.enrich((video_id(it) for it in data.get("items", [])), speculative=True)
 
-init_db()
+warmer = SessionWarmer(
+    history=lambda user_id, limit: preference_store.recent_searches(user_id, limit, distinct=True),
+    fetch=warm_search,
+    can_run=lambda: quota.allow_speculative() and not engine.busy(),
+    depth=int(os.getenv("WARMUP_QUERIES", "5")),
+    workers=int(os.getenv("WARMUP_WORKERS", "2")),
+)
+
+# /api/search/bulk: a pool shared by all bulk requests caps their upstream concurrency,
+# and each request keeps at most BULK_SEARCH_WINDOW queries in flight
+bulk_runner = BulkRunner(
+    workers=int(os.getenv("BULK_SEARCH_WORKERS", "4")),
+    window=int(os.getenv("BULK_SEARCH_WINDOW", "8")),
+)
+BULK_SEARCH_MAX_QUERIES = int(os.getenv("BULK_SEARCH_MAX_QUERIES", "1000"))
+
+# Everything we have shown, searchable locally when the quota runs out or upstream is down
+local_index = LocalVideoIndex(max_rows=int(os.getenv("LOCAL_INDEX_MAX_ROWS", "2000000")))
+
+# Typeahead index over global popular queries and each user's history
+suggester = Suggester(preference_store)
+
+# Voice search fires handle_search twice (voice output + button click); repeats of the
+# same query from the same browser within this window reuse the first rendering.
+trigger_flight = SingleFlight(linger=float(os.getenv("SEARCH_TRIGGER_WINDOW", "2")))
+
+# Firebase ID tokens, verified once against Google's signing certs and then
+# remembered until they expire
+token_verifier = TokenVerifier(
+    os.getenv("FIREBASE_PROJECT_ID"),
+    cache_size=int(os.getenv("VERIFIED_TOKEN_CACHE_SIZE", "10000")),
+)
+
+def client_id():
+    return f"{flask.request.remote_addr}|{flask.request.headers.get('User-Agent', '')}"
+
+def tab_key(session_id):
+    # Coalescing must only merge repeats from one browser tab; address and
+    # User-Agent alone would merge different users behind the same proxy.
+    return session_id or client_id()
+
+# YOUTUBE_REGION_CODE may list several regions, e.g. "IN,US,GB"; the first is the default
+TRENDING_REGIONS = [r.strip() for r in os.getenv("YOUTUBE_REGION_CODE", "IN").split(",") if r.strip()] or ["IN"]
+DEFAULT_REGION = TRENDING_REGIONS[0]
+trending_feed = TrendingFeed(
+    youtube,
+    TRENDING_REGIONS,
+    interval=float(os.getenv("TRENDING_REFRESH_INTERVAL", "300")),
+    store=response_cache,
+    on_refresh=lambda items: enricher.enrich((video_id(it) for it in items), speculative=True),
+)
+
+def start_background_work():
+    # Runs before every request; starts per-process threads the first time, so a
+    # preloaded gunicorn master forks workers without any threads of its own.
+    if os.getenv("YOUTUBE_API_KEY"):
+        trending_feed.start()
+
+# Whole /_dash-update-component requests, including Dash's JSON serialization of
+# the outputs; compare with callback_phase_seconds{phase="total"} to see that share.
+DASH_REQUEST = registry.histogram(
+    "dash_request_seconds", "Dash callback requests end to end", ("output",))
+
+def start_request_timer():
+    flask.g.request_start = time.perf_counter()
+
+def observe_dash_request(response):
+    start = flask.g.get("request_start")
+    if start is not None and flask.request.path.endswith("/_dash-update-component"):
+        body = flask.request.get_json(silent=True) or {}
+        DASH_REQUEST.observe(time.perf_counter() - start, body.get("output", ""))
+    return response
+
+# ---------- METRICS ----------
+BULK_QUERIES = registry.counter("bulk_search_queries_total", "Queries answered by /api/search/bulk", ("result",))
+CACHES = {"search": search_cache, "trending_page": trending_pages, "video_meta": enricher.cache}
+
+def cache_samples(*fields):
+    for name, cache in CACHES.items():
+        stats = cache.stats()
+        for field in fields:
+            yield ((name, field) if len(fields) > 1 else (name,)), stats[field]
+
+registry.collected("cache_lookups_total", "In-process cache lookups by outcome", ("cache", "result"),
+                   lambda: cache_samples("hits", "stale_hits", "l2_hits", "misses"), kind="counter")
+registry.collected("cache_hit_ratio", "Share of lookups served from cache (fresh, stale or disk)", ("cache",),
+                   lambda: cache_samples("hit_ratio"))
+registry.collected("cache_entries", "Entries held in memory", ("cache",), lambda: cache_samples("size"))
+registry.collected("cache_evictions_total", "LRU evictions", ("cache",),
+                   lambda: cache_samples("evictions"), kind="counter")
+registry.collected("quota_remaining_units", "YouTube Data API units left today", (),
+                   lambda: [((), quota.remaining())])
+registry.collected("quota_shed_total", "Upstream calls refused by the quota accountant", (),
+                   lambda: [((), quota.shed)], kind="counter")
+registry.collected("upstream_coalesced_total", "Requests that shared another caller's upstream round trip", (),
+                   lambda: [((), youtube.flight.shared)], kind="counter")
+registry.collected("fetch_in_flight", "Upstream calls running on the fetch engine", (),
+                   lambda: [((), engine.in_flight)])
+registry.collected("fetch_timeouts_total", "Upstream calls abandoned at their deadline", (),
+                   lambda: [((), engine.timeouts)], kind="counter")
+registry.collected("warmup_queries_total", "Recent searches prefetched on sign-in", (),
+                   lambda: [((), warmer.queries_warmed)], kind="counter")
 
 # ---------- UI COMPONENTS ----------
 def navbar():
@@ -120,6 +297,8 @@ def hero_section():
                                         type="text",
                                         className="search-input",
                                         debounce=False,
+                                        list="search-suggestions",
+                                        autoComplete="off",
                                     ),
                                     dbc.Button(
                                         [html.I(className="fas fa-search me-2"), "Search"],
@@ -136,6 +315,7 @@ def hero_section():
                                 ],
                                 className="search-group mt-3"
                             ),
+                            html.Datalist(id="search-suggestions"),  # filled by assets/suggest.js
                             html.Small("Press Enter to search", className="search-hint mt-2 d-block")
                         ],
                         md=10,
@@ -150,12 +330,91 @@ def hero_section():
         className="hero-section"
     )
 
+CARD_LABELS = {"search": ("Video", "Watch Video"), "trending": ("Trending", "Watch"), "local": ("Saved", "Watch Video")}
+
+def video_id(item):
+    # search results nest the id ({"videoId": ...}); videos.list returns it as a string
+    vid = item.get("id", "")
+    return vid if isinstance(vid, str) else vid.get("videoId", "")
+
+# Send results as compact JSON and build the cards in the browser (assets/cards.js)
+# instead of serializing a component tree per card.
+CLIENT_SIDE_CARDS = os.getenv("CLIENT_SIDE_CARDS", "0") == "1"
+
+# Render with whatever metadata is cached, never waiting on videos.list: local results
+# are served when upstream is unavailable, and trending metadata is fetched by the
+# refresher thread (and by prefetch for later pages) so Home clicks stay off the network.
+CACHED_META_MODES = {"local", "trending"}
+
+def result_cols(items, mode):
+    badge, button_label = CARD_LABELS[mode]
+    ids = [video_id(it) for it in items]
+    meta = enricher.enrich(ids, cached_only=(mode in CACHED_META_MODES))
+    return [video_col(vid, it.get("snippet", {}), badge, button_label, meta.get(vid))
+            for vid, it in zip(ids, items)]
+
+def compact_results(items, mode):
+    ids = [video_id(it) for it in items]
+    meta = enricher.enrich(ids, cached_only=(mode in CACHED_META_MODES))
+    rows = []
+    for vid, it in zip(ids, items):
+        snip = it.get("snippet", {})
+        m = meta.get(vid) or {}
+        rows.append({
+            "id": vid,
+            "title": snip.get("title", "Untitled"),
+            "channel": snip.get("channelTitle", "Unknown"),
+            "thumb": (snip.get("thumbnails", {}) or {}).get("medium", {}).get("url", ""),
+            "desc": snip.get("description", ""),
+            "details": " • ".join(v for v in (m.get("duration"), m.get("views")) if v),
+        })
+    badge, button_label = CARD_LABELS[mode]
+    return {"items": rows, "badge": badge, "button": button_label}
+
+def render_results(items, mode, append=False):
+    # Returns (page-content value, results-payload value); exactly one is no_update.
+    if CLIENT_SIDE_CARDS:
+        return no_update, dict(compact_results(items, mode), append=append)
+    return result_cols(items, mode), no_update
+
+def results_state(mode, query, next_token):
+    # "search" is new for every result list, so a page loaded for an older one can be told apart.
+    return {"search": uuid.uuid4().hex[:12], "mode": mode, "query": query,
+            "region": DEFAULT_REGION, "next": next_token}
+
+def video_col(vid, snip, badge, button_label, meta=None):
+    thumb = (snip.get("thumbnails", {}) or {}).get("medium", {}).get("url", "")
+    title = snip.get("title", "Untitled")
+    desc = snip.get("description", "")
+    channel = snip.get("channelTitle", "Unknown")
+    details = " • ".join(v for v in ((meta or {}).get("duration"), (meta or {}).get("views")) if v)
+    card = dbc.Card(
+        [
+            dbc.CardImg(src=thumb, top=True, className="video-thumbnail"),
+            dbc.CardBody([
+                dbc.Badge(badge, color="danger", className="me-2"),
+                html.H5(title, className="video-title"),
+                html.Small(channel, className="d-block text-muted mb-2"),
+                html.Small(details, className="d-block text-muted mb-2") if details else None,
+                html.P(desc, className="video-description", style={"maxHeight": "4.5rem", "overflow": "hidden"})
+            ]),
+            dbc.CardFooter(
+                dbc.Button(button_label, color="danger", href=f"https://www.youtube.com/watch?v={vid}", target="_blank", className="w-100")
+            )
+        ],
+        className="video-card h-100 rounded-4 shadow-sm"
+    )
+    return dbc.Col(card, xs=12, sm=6, lg=4, xl=3, className="mb-4")
+
 def main_content():
     return html.Main(
         dbc.Container(
             [
                 html.Div(id="search-results-header", className="results-header"),
-                dbc.Row(id="page-content", className="results-grid")
+                dbc.Row(id="page-content", className="results-grid"),
+                # assets/infinite_scroll.js clicks the hidden button when the sentinel scrolls into view
+                html.Div(id="scroll-sentinel"),
+                html.Button(id="load-more-button", n_clicks=0, style={"display": "none"})
             ],
             fluid=True,
             className="py-4"
@@ -185,153 +444,54 @@ def footer():
     )
 
 # App layout
-app.layout = html.Div(
-    [
-        dcc.Store(id='user-store', storage_type='session'),
-        dcc.Location(id='url', refresh=False),
-
-        html.Div(id="voice-search-output", style={"display": "none"}),
-        html.Div(id="firebase-user", style={"display": "none"}),
-
-        navbar(),
-        hero_section(),
-        main_content(),
-        footer(),
-
-        html.Script(src="https://www.gstatic.com/firebasejs/8.10.0/firebase-app.js"),
-        html.Script(src="https://www.gstatic.com/firebasejs/8.10.0/firebase-auth.js"),
-        html.Script(
-            f"""
-            // CLIENT-SIDE FIREBASE CONFIG & AUTH HANDLERS
-            const firebaseConfig = {{
-                apiKey: "{os.getenv('FIREBASE_API_KEY') or ''}",
-                authDomain: "{os.getenv('FIREBASE_AUTH_DOMAIN') or ''}",
-                projectId: "{os.getenv('FIREBASE_PROJECT_ID') or ''}",
-                storageBucket: "{os.getenv('FIREBASE_STORAGE_BUCKET') or ''}",
-                messagingSenderId: "{os.getenv('FIREBASE_MESSAGING_SENDER_ID') or ''}",
-                appId: "{os.getenv('FIREBASE_APP_ID') or ''}"
-            }};
-            try {{
-                if (!window.firebase?.apps?.length) {{
-                    firebase.initializeApp(firebaseConfig);
-                }}
-            }} catch (e) {{
-                console.warn("Firebase init failed:", e);
-            }}
-
-            function signInWithGoogle() {{
-                const provider = new firebase.auth.GoogleAuthProvider();
-                firebase.auth().signInWithPopup(provider)
-                    .then((result) => {{
-                        const user = result.user;
-                        user.getIdToken().then((token) => {{
-                            const payload = {{
-                                email: user.email,
-                                displayName: user.displayName,
-                                token: token
-                            }};
-                            const el = document.getElementById('firebase-user');
-                            if (el) el.innerText = JSON.stringify(payload);
-                        }});
-                    }}).catch((err) => {{
-                        console.error("Sign-in error:", err);
-                        alert("Google Sign-in failed. Check console.");
-                    }});
-            }}
-
-            function signOutGoogle() {{
-                firebase.auth().signOut()
-                    .then(() => {{
-                        const el = document.getElementById('firebase-user');
-                        if (el) el.innerText = "";
-                    }})
-                    .catch((err) => {{
-                        console.error("Sign-out failed:", err);
-                    }});
-            }}
-
-            // wire auth buttons (they are rendered by Dash; use MutationObserver)
-            (function wireAuthButtons() {{
-                function wire() {{
-                    const inBtn = document.getElementById('signin-button');
-                    if (inBtn && !inBtn.dataset._wired) {{
-                        inBtn.addEventListener('click', (e) => {{ e.preventDefault(); signInWithGoogle(); }});
-                        inBtn.dataset._wired = '1';
-                    }}
-                    const outBtn = document.getElementById('signout-button');
-                    if (outBtn && !outBtn.dataset._wired) {{
-                        outBtn.addEventListener('click', (e) => {{ e.preventDefault(); signOutGoogle(); }});
-                        outBtn.dataset._wired = '1';
-                    }}
-                }}
-                const obs = new MutationObserver(wire);
-                obs.observe(document.body, {{ childList: true, subtree: true }});
-                document.addEventListener('DOMContentLoaded', wire);
-            }})();
-
-            // VOICE SEARCH: Web Speech API
-            (function wireVoice() {{
-                const micBtnId = 'voice-search-btn-hero';
-                function startRecognition() {{
-                    const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
-                    if (!SpeechRecognition) {{
-                        alert('Speech Recognition API not supported in this browser.');
-                        return;
-                    }}
-                    const rec = new SpeechRecognition();
-                    rec.lang = 'en-US';
-                    rec.interimResults = false;
-                    rec.maxAlternatives = 1;
-                    rec.onresult = (ev) => {{
-                        const text = ev.results[0][0].transcript || '';
-                        const voiceEl = document.getElementById('voice-search-output');
-                        if (voiceEl) {{
-                            voiceEl.innerText = text;
-                        }}
-                        const input = document.getElementById('search-input-hero');
-                        const searchBtn = document.getElementById('search-button-hero');
-                        if (input) input.value = text;
-                        if (searchBtn) searchBtn.click();
-                    }};
-                    rec.onerror = (e) => {{
-                        console.error('Speech recognition error', e);
-                        alert('Voice recognition failed. See console for details.');
-                    }};
-                    rec.start();
-                }}
-
-                function wire() {{
-                    const btn = document.getElementById(micBtnId);
-                    if (btn && !btn.dataset._wired) {{
-                        btn.addEventListener('click', (e) => {{
-                            e.preventDefault();
-                            startRecognition();
-                        }});
-                        btn.dataset._wired = '1';
-                    }}
-                }}
-                const obs = new MutationObserver(wire);
-                obs.observe(document.body, {{ childList: true, subtree: true }});
-                document.addEventListener('DOMContentLoaded', wire);
-            }})();
-            """
-        )
-    ],
-    className="app-wrapper"
-)
+def build_layout():
+    return html.Div(
+        [
+            dcc.Store(id='user-store', storage_type='session'),
+            dcc.Store(id='session-id', storage_type='session'),  # per-tab id, see assets/session.js
+            dcc.Store(id='results-state'),
+            dcc.Store(id='results-payload'),
+            dcc.Store(id='next-page'),  # applied by assets/infinite_scroll.js if still current
+            dcc.Location(id='url', refresh=False),
+
+            html.Div(id="voice-search-output", style={"display": "none"}),
+            html.Div(id="firebase-user", style={"display": "none"}),
+
+            navbar(),
+            hero_section(),
+            main_content(),
+            footer(),
+        ],
+        className="app-wrapper"
+    )
+
+def signed_in_user(firebase_user_json):
+    # The browser-supplied payload is only a carrier for the ID token; identity
+    # comes from the verified claims, never from the payload's own fields.
+    try:
+        payload = json.loads(firebase_user_json) if firebase_user_json else None
+    except Exception:
+        payload = None
+    if not isinstance(payload, dict):
+        return None
+    try:
+        claims = token_verifier.verify(payload.get("token"))
+    except InvalidToken:
+        return None
+    return {"uid": claims["sub"], "email": claims.get("email") or claims["sub"]}
 
-@app.callback(
+@callback(
     Output("user-auth-section", "children"),
     Input("firebase-user", "children"),
     prevent_initial_call=False
 )
+@CALLBACK_PHASE.timed("update_auth_section", "total")
 def update_auth_section(firebase_user_json):
-    try:
-        payload = json.loads(firebase_user_json) if firebase_user_json else None
-    except Exception:
-        payload = None
+    with CALLBACK_PHASE.time("update_auth_section", "verify"):
+        payload = signed_in_user(firebase_user_json)
 
-    if payload and isinstance(payload, dict) and payload.get("email"):
+    if payload:
+        warmer.warm(payload["email"])
         user_badge = dbc.Badge(payload.get("email"), color="light", text_color="dark", className="me-2")
         signout = dbc.Button([html.I(className="fas fa-sign-out-alt me-2"), "Sign out"],
                              id="signout-button", color="light", outline=True, size="sm")
@@ -341,18 +501,98 @@ def update_auth_section(firebase_user_json):
                             id="signin-button", color="light", outline=True, size="sm")
         return signin
 
-@app.callback(
+def suggest_queries():
+    user = signed_in_user(flask.request.headers.get("X-Firebase-User"))
+    prefix = flask.request.args.get("q", "")
+    return flask.jsonify(suggester.suggest(prefix, user and user["email"]))
+
+def quota_status():
+    return flask.jsonify(quota.snapshot())
+
+def bulk_search():
+    # POST {"queries": [...], "region": "US", "max_results": 20}, or a text/plain body
+    # with one query per line. Streams one NDJSON line per query as it completes:
+    # {"index", "query", "items", "next_page_token"} or {"index", "query", "error"}.
+    # Disabled unless BULK_SEARCH_TOKEN is set; send it as a bearer token.
+    token = os.getenv("BULK_SEARCH_TOKEN")
+    if not token:
+        flask.abort(404)
+    supplied = flask.request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        flask.abort(403)
+
+    if flask.request.is_json:
+        body = flask.request.get_json(silent=True) or {}
+        queries = body.get("queries") if isinstance(body, dict) else None
+    else:
+        body = flask.request.args
+        queries = flask.request.get_data(as_text=True).splitlines()
+    if not isinstance(queries, list):
+        return flask.jsonify(error="expected a list of queries"), 400
+    queries = [str(q).strip() for q in queries if str(q).strip()]
+    if len(queries) > BULK_SEARCH_MAX_QUERIES:
+        return flask.jsonify(error=f"at most {BULK_SEARCH_MAX_QUERIES} queries per request"), 413
+    region = str(body.get("region") or DEFAULT_REGION).upper()
+    try:
+        max_results = min(50, max(1, int(body.get("max_results") or 20)))
+    except (TypeError, ValueError):
+        return flask.jsonify(error="max_results must be an integer"), 400
+
+    # Speculative so tooling can never eat into the budget interactive users need;
+    # cached queries are still answered when the quota guard says no.
+    def search(query):
+        return fetch_search_results(query, region, max_results, None, speculative=True)
+
+    def lines():
+        for index, query, data, error in bulk_runner.run(search, queries):
+            row = {"index": index, "query": query}
+            if error is None:
+                row["items"] = data.get("items", [])
+                row["next_page_token"] = data.get("nextPageToken")
+            elif isinstance(error, QuotaExceeded):
+                row["error"] = f"quota: {error}"
+            else:
+                row["error"] = f"{type(error).__name__}: {error}"
+            BULK_QUERIES.inc("error" if error is not None else "ok")
+            yield json.dumps(row) + "\n"
+
+    return flask.Response(flask.stream_with_context(lines()), mimetype="application/x-ndjson")
+
+def metrics_endpoint():
+    return flask.Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+def firebase_config_js():
+    # Public web-app config for assets/firebase_auth.js; kept out of the layout
+    # so the page itself is static.
+    config = {
+        "apiKey": os.getenv("FIREBASE_API_KEY") or "",
+        "authDomain": os.getenv("FIREBASE_AUTH_DOMAIN") or "",
+        "projectId": os.getenv("FIREBASE_PROJECT_ID") or "",
+        "storageBucket": os.getenv("FIREBASE_STORAGE_BUCKET") or "",
+        "messagingSenderId": os.getenv("FIREBASE_MESSAGING_SENDER_ID") or "",
+        "appId": os.getenv("FIREBASE_APP_ID") or "",
+    }
+    body = f"window.firebaseConfig = {json.dumps(config)};"
+    return flask.Response(body, mimetype="application/javascript",
+                          headers={"Cache-Control": "public, max-age=3600"})
+
+@callback(
     [Output("page-content", "children"),
      Output("search-results-header", "children"),
-     Output("search-input-hero", "value")],  # CLEAR input when Home is clicked
+     Output("search-input-hero", "value"),  # CLEAR input when Home is clicked
+     Output("results-state", "data"),
+     Output("results-payload", "data")],
     [Input("search-button-hero", "n_clicks"),
      Input("search-input-hero", "n_submit"),
      Input("voice-search-output", "children"),
      Input("home-button", "n_clicks")],
-    [State("search-input-hero", "value")],
+    [State("search-input-hero", "value"),
+     State("firebase-user", "children"),
+     State("session-id", "data")],
     prevent_initial_call=False
 )
-def handle_search(search_click, enter_submit, voice_text, home_click, search_value):
+@CALLBACK_PHASE.timed("handle_search", "total")
+def handle_search(search_click, enter_submit, voice_text, home_click, search_value, firebase_user_json, session_id=None):
     ctx = callback_context
     triggered = ctx.triggered[0]['prop_id'] if ctx.triggered else None
 
@@ -360,47 +600,25 @@ def handle_search(search_click, enter_submit, voice_text, home_click, search_val
         api_key = os.getenv("YOUTUBE_API_KEY")
         if not api_key:
             msg = dbc.Col(html.Div("YouTube API key is not configured", className="empty-state"), xs=12)
-            return [msg], "", ""   # third output clears input
+            return [msg], "", "", None, no_update   # third output clears input
 
-        region = os.getenv("YOUTUBE_REGION_CODE", "IN")
-        url = ("https://www.googleapis.com/youtube/v3/videos"
-               f"?part=snippet&chart=mostPopular&maxResults=20&regionCode={region}&key={api_key}")
         try:
-            resp = requests.get(url, timeout=12)
-            resp.raise_for_status()
-            data = resp.json()
-            items = data.get("items", [])
+            with CALLBACK_PHASE.time("handle_search", "upstream"):
+                snapshot = trending_feed.cached(DEFAULT_REGION) or engine.run(trending_feed.get, DEFAULT_REGION)
+            items = snapshot["items"]
             if not items:
                 msg = dbc.Col(html.Div("No trending videos found.", className="empty-state"), xs=12)
-                return [msg], html.H5("Trending"), ""
-            cols = []
-            for item in items:
-                vid = item.get("id")
-                snip = item.get("snippet", {})
-                thumb = (snip.get("thumbnails", {}) or {}).get("medium", {}).get("url", "")
-                title = snip.get("title", "Untitled")
-                desc = snip.get("description", "")
-                channel = snip.get("channelTitle", "Unknown")
-                card = dbc.Card(
-                    [
-                        dbc.CardImg(src=thumb, top=True, className="video-thumbnail"),
-                        dbc.CardBody([
-                            dbc.Badge("Trending", color="danger", className="me-2"),
-                            html.H5(title, className="video-title"),
-                            html.Small(channel, className="d-block text-muted mb-2"),
-                            html.P(desc, className="video-description", style={"maxHeight": "4.5rem", "overflow": "hidden"})
-                        ]),
-                        dbc.CardFooter(
-                            dbc.Button("Watch", color="danger", href=f"https://www.youtube.com/watch?v={vid}", target="_blank", className="w-100")
-                        )
-                    ], className="video-card h-100 rounded-4 shadow-sm"
-                )
-                cols.append(dbc.Col(card, xs=12, sm=6, lg=4, xl=3, className="mb-4"))
+                return [msg], html.H5("Trending"), "", None, no_update
+            state = results_state("trending", "", snapshot.get("next_page_token"))
+            prefetch_next_page(state)
+            local_index.ingest_async(items)
+            with CALLBACK_PHASE.time("handle_search", "render"):
+                cards, payload = render_results(items, "trending")
             header = html.H5([html.I(className="fa-solid fa-fire me-2"), "Trending Videos"])
-            return cols, header, ""   # clear search input
+            return cards, header, "", state, payload   # clear search input
         except Exception as e:
             msg = dbc.Col(html.Div(f"Error fetching trending videos: {e}", className="empty-state"), xs=12)
-            return [msg], "", ""
+            return [msg], "", "", None, no_update
 
     query = ""
     if voice_text and str(voice_text).strip():
@@ -419,62 +637,162 @@ def handle_search(search_click, enter_submit, voice_text, home_click, search_val
             ),
             xs=12
         )
-        return [placeholder], "", search_value or ""
+        return [placeholder], "", search_value or "", None, no_update
 
     api_key = os.getenv("YOUTUBE_API_KEY")
     if not api_key:
         msg = dbc.Col(html.Div("YouTube API key is not configured", className="empty-state"), xs=12)
-        return [msg], "", search_value or ""
+        return [msg], "", search_value or "", None, no_update
 
-    url = (
-        "https://www.googleapis.com/youtube/v3/search"
-        f"?part=snippet&q={urllib.parse.quote(query)}&type=video&maxResults=20&key={api_key}"
+    user = signed_in_user(firebase_user_json)
+    user_id = user and user["email"]
+    (view, searched), leader = trigger_flight.do_leader(
+        (tab_key(session_id), normalize_query(query)),
+        lambda: search_results_view(query, search_value, user_id),
     )
+    # Duplicate triggers share the view and count as one search; only the
+    # caller that ran it records it, after the shared work is done.
+    if searched and leader:
+        with CALLBACK_PHASE.time("handle_search", "record"):
+            if user_id:
+                write_queue.record_search(user_id, query)  # flushed off the request path
+            suggester.record(query, user_id, client=client_id())
+    return view
 
+def search_results_view(query, search_value, user_id=None):
+    # Returns (outputs, searched): searched is False when YouTube could not be asked.
     try:
-        resp = requests.get(url, timeout=15)
-        resp.raise_for_status()
-        data = resp.json()
+        with CALLBACK_PHASE.time("handle_search", "upstream"):
+            data = fetch_search_results(query, DEFAULT_REGION, 20, None, user_id)
         items = data.get("items", [])
         if not items:
             msg = dbc.Col(html.Div("No results found for your search", className="empty-state"), xs=12)
             header = html.H5([html.I(className="fa-solid fa-list me-2"), "Results for:", html.Span(f" {query}", className="text-muted")])
-            return [msg], header, query
-
-        cols = []
-        for it in items:
-            vid = it.get("id", {}).get("videoId", "")
-            snip = it.get("snippet", {})
-            thumb = (snip.get("thumbnails", {}) or {}).get("medium", {}).get("url", "")
-            title = snip.get("title", "Untitled")
-            desc = snip.get("description", "")
-            channel = snip.get("channelTitle", "Unknown")
-            card = dbc.Card(
-                [
-                    dbc.CardImg(src=thumb, top=True, className="video-thumbnail"),
-                    dbc.CardBody([
-                        dbc.Badge("Video", color="danger", className="me-2"),
-                        html.H5(title, className="video-title"),
-                        html.Small(channel, className="d-block text-muted mb-2"),
-                        html.P(desc, className="video-description", style={"maxHeight": "4.5rem", "overflow": "hidden"})
-                    ]),
-                    dbc.CardFooter(
-                        dbc.Button("Watch Video", color="danger", href=f"https://www.youtube.com/watch?v={vid}", target="_blank", className="w-100")
-                    )
-                ],
-                className="video-card h-100 rounded-4 shadow-sm"
-            )
-            cols.append(dbc.Col(card, xs=12, sm=6, lg=4, xl=3, className="mb-4"))
+            return ([msg], header, query, None, no_update), True
+
+        state = results_state("search", query, data.get("nextPageToken"))
+        prefetch_next_page(state)
+        local_index.ingest_async(items)
+        with CALLBACK_PHASE.time("handle_search", "render"):
+            cards, payload = render_results(items, "search")
 
-        header = html.H5([html.I(className="fa-solid fa-list me-2"), "Results for:", html.Span(f" {query}", className="text-muted"), html.Span(f" • {len(cols)} videos", className="text-muted ms-2")])
-        return cols, header, query
+        header = html.H5([html.I(className="fa-solid fa-list me-2"), "Results for:", html.Span(f" {query}", className="text-muted"), html.Span(f" • {len(items)} videos", className="text-muted ms-2")])
+        return (cards, header, query, state, payload), True
 
-    except requests.exceptions.RequestException as e:
+    except QuotaExceeded as e:
+        fallback = local_results_view(query)
+        if fallback:
+            return fallback, False
+        msg = dbc.Col(html.Div(f"Search is limited right now ({e}). Please try again later.", className="empty-state"), xs=12)
+        return ([msg], "", search_value or "", None, no_update), False
+    except (requests.exceptions.RequestException, TimeoutError) as e:
+        fallback = local_results_view(query)
+        if fallback:
+            return fallback, False
         msg = dbc.Col(html.Div(f"Error connecting to YouTube API: {e}", className="empty-state"), xs=12)
-        return [msg], "", search_value or ""
+        return ([msg], "", search_value or "", None, no_update), False
     except Exception as e:
         msg = dbc.Col(html.Div(f"An unexpected error occurred: {e}", className="empty-state"), xs=12)
-        return [msg], "", search_value or ""
+        return ([msg], "", search_value or "", None, no_update), False
+
+def local_results_view(query):
+    # Served when YouTube cannot be asked: no pagination, and only cached durations/views.
+    with CALLBACK_PHASE.time("handle_search", "local_index"):
+        items = local_index.search(query)
+    if not items:
+        return None
+    cards, payload = render_results(items, "local")
+    header = html.H5([html.I(className="fa-solid fa-box-archive me-2"), "Saved results for:", html.Span(f" {query}", className="text-muted"), html.Span(f" • {len(items)} videos (YouTube unavailable)", className="text-muted ms-2")])
+    return cards, header, query, None, payload
+
+# A page goes to next-page rather than straight into the grid: a new search may
+# have replaced the results while it loaded, and only the browser knows that.
+@callback(
+    Output("next-page", "data"),
+    Input("load-more-button", "n_clicks"),
+    State("results-state", "data"),
+    State("session-id", "data"),
+    prevent_initial_call=True
+)
+def load_more(n_clicks, state, session_id=None):
+    if not state or not state.get("next"):
+        return no_update
+    # The scroll observer can fire more than once for the same page.
+    # Page tokens encode only the position, so every query's page 2 shares a token.
+    key = (tab_key(session_id), state.get("search"), state["mode"], state.get("query"), state["next"])
+    return trigger_flight.do(key, lambda: next_page_view(state))
+
+def next_page_view(state):
+    try:
+        data = fetch_page(state)
+    except (requests.exceptions.RequestException, TimeoutError, QuotaExceeded):
+        return no_update  # the next scroll retries
+    items = data.get("items", [])
+    state = dict(state, next=data.get("nextPageToken"))
+    prefetch_next_page(state)
+    local_index.ingest_async(items)
+    cards, payload = render_results(items, state["mode"], append=True)
+    return {
+        "search": state.get("search"),
+        "state": state,
+        "cards": None if cards is no_update else cards,
+        "payload": None if payload is no_update else payload,
+    }
+
+clientside_callback(
+    ClientsideFunction(namespace="results", function_name="appendPage"),
+    Output("page-content", "children", allow_duplicate=True),
+    Output("results-state", "data", allow_duplicate=True),
+    Output("results-payload", "data", allow_duplicate=True),
+    Input("next-page", "data"),
+    State("results-state", "data"),
+    State("page-content", "children"),
+    prevent_initial_call=True
+)
+
+# Gives each browser tab its own id on first load
+clientside_callback(
+    ClientsideFunction(namespace="session", function_name="ensureId"),
+    Output("session-id", "data"),
+    Input("url", "pathname"),
+    State("session-id", "data"),
+)
+
+# Grid rendering from results-payload when CLIENT_SIDE_CARDS is on; see assets/cards.js
+clientside_callback(
+    ClientsideFunction(namespace="cards", function_name="render"),
+    Output("page-content", "children", allow_duplicate=True),
+    Input("results-payload", "data"),
+    State("page-content", "children"),
+    prevent_initial_call=True
+)
+
+def create_app():
+    # Callbacks are registered globally above; this builds the Dash/Flask app
+    # around them. Nothing here opens a database or starts a thread.
+    app = dash.Dash(
+        __name__,
+        external_stylesheets=external_stylesheets,
+        external_scripts=external_scripts,
+        suppress_callback_exceptions=True,
+        meta_tags=[{'name': 'viewport', 'content': 'width=device-width, initial-scale=1.0'}]
+    )
+    app.title = "YouTube Focus - Distraction Free"
+    app.layout = build_layout()
+
+    server = app.server
+    server.add_url_rule("/firebase-config.js", view_func=firebase_config_js)
+    server.add_url_rule("/api/suggest", view_func=suggest_queries)
+    server.add_url_rule("/api/quota", view_func=quota_status)
+    server.add_url_rule("/api/search/bulk", view_func=bulk_search, methods=["POST"])
+    server.add_url_rule("/metrics", view_func=metrics_endpoint)
+    server.before_request(start_background_work)
+    server.before_request(start_request_timer)
+    server.after_request(observe_dash_request)
+    return app
+
+app = create_app()
+server = app.server
 
 if __name__ == '__main__':
     app.run_server(debug=True, port=8050)
@@ -0,0 +1,62 @@
+// CLIENT-SIDE CARDS: builds the result grid from the compact results-payload store.
+// Mirrors video_col() in app.py; only used when CLIENT_SIDE_CARDS=1.
+(function () {
+    const DBC = 'dash_bootstrap_components';
+    const HTML = 'dash_html_components';
+
+    function el(namespace, type, props) {
+        return { namespace: namespace, type: type, props: props };
+    }
+
+    function card(row, badge, buttonLabel) {
+        const body = [
+            el(DBC, 'Badge', { children: badge, color: 'danger', className: 'me-2' }),
+            el(HTML, 'H5', { children: row.title, className: 'video-title' }),
+            el(HTML, 'Small', { children: row.channel, className: 'd-block text-muted mb-2' })
+        ];
+        if (row.details) {
+            body.push(el(HTML, 'Small', { children: row.details, className: 'd-block text-muted mb-2' }));
+        }
+        body.push(el(HTML, 'P', {
+            children: row.desc,
+            className: 'video-description',
+            style: { maxHeight: '4.5rem', overflow: 'hidden' }
+        }));
+        return el(DBC, 'Col', {
+            xs: 12, sm: 6, lg: 4, xl: 3, className: 'mb-4',
+            children: el(DBC, 'Card', {
+                className: 'video-card h-100 rounded-4 shadow-sm',
+                children: [
+                    el(DBC, 'CardImg', { src: row.thumb, top: true, className: 'video-thumbnail' }),
+                    el(DBC, 'CardBody', { children: body }),
+                    el(DBC, 'CardFooter', {
+                        children: el(DBC, 'Button', {
+                            children: buttonLabel,
+                            color: 'danger',
+                            href: 'https://www.youtube.com/watch?v=' + encodeURIComponent(row.id),
+                            target: '_blank',
+                            className: 'w-100'
+                        })
+                    })
+                ]
+            })
+        });
+    }
+
+    window.dash_clientside = window.dash_clientside || {};
+    Object.assign(window.dash_clientside, {
+        cards: {
+            render: function (payload, current) {
+                if (!payload) {
+                    return window.dash_clientside.no_update;
+                }
+                const cols = (payload.items || []).map((row) => card(row, payload.badge, payload.button));
+                if (payload.append) {
+                    const existing = Array.isArray(current) ? current : (current ? [current] : []);
+                    return existing.concat(cols);
+                }
+                return cols;
+            }
+        }
+    });
+})();
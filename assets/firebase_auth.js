@@ -0,0 +1,74 @@
+// CLIENT-SIDE FIREBASE AUTH HANDLERS
+// window.firebaseConfig comes from /firebase-config.js, loaded ahead of assets.
+try {
+    if (!window.firebase?.apps?.length) {
+        firebase.initializeApp(window.firebaseConfig || {});
+    }
+} catch (e) {
+    console.warn("Firebase init failed:", e);
+}
+
+// ID tokens expire hourly; hand the refreshed one to the server.
+if (window.firebase?.apps?.length) {
+    firebase.auth().onIdTokenChanged((user) => {
+        const el = document.getElementById('firebase-user');
+        if (!el || !user) return;
+        user.getIdToken().then((token) => {
+            el.innerText = JSON.stringify({
+                email: user.email,
+                displayName: user.displayName,
+                token: token
+            });
+        });
+    });
+}
+
+function signInWithGoogle() {
+    const provider = new firebase.auth.GoogleAuthProvider();
+    firebase.auth().signInWithPopup(provider)
+        .then((result) => {
+            const user = result.user;
+            user.getIdToken().then((token) => {
+                const payload = {
+                    email: user.email,
+                    displayName: user.displayName,
+                    token: token
+                };
+                const el = document.getElementById('firebase-user');
+                if (el) el.innerText = JSON.stringify(payload);
+            });
+        }).catch((err) => {
+            console.error("Sign-in error:", err);
+            alert("Google Sign-in failed. Check console.");
+        });
+}
+
+function signOutGoogle() {
+    firebase.auth().signOut()
+        .then(() => {
+            const el = document.getElementById('firebase-user');
+            if (el) el.innerText = "";
+        })
+        .catch((err) => {
+            console.error("Sign-out failed:", err);
+        });
+}
+
+// wire auth buttons (they are rendered by Dash; use MutationObserver)
+(function wireAuthButtons() {
+    function wire() {
+        const inBtn = document.getElementById('signin-button');
+        if (inBtn && !inBtn.dataset._wired) {
+            inBtn.addEventListener('click', (e) => { e.preventDefault(); signInWithGoogle(); });
+            inBtn.dataset._wired = '1';
+        }
+        const outBtn = document.getElementById('signout-button');
+        if (outBtn && !outBtn.dataset._wired) {
+            outBtn.addEventListener('click', (e) => { e.preventDefault(); signOutGoogle(); });
+            outBtn.dataset._wired = '1';
+        }
+    }
+    const obs = new MutationObserver(wire);
+    obs.observe(document.body, { childList: true, subtree: true });
+    document.addEventListener('DOMContentLoaded', wire);
+})();
@@ -0,0 +1,43 @@
+// INFINITE SCROLL: request the next page when the sentinel below the grid becomes visible
+(function wireInfiniteScroll() {
+    const MIN_INTERVAL_MS = 800;
+    let lastRequest = 0;
+
+    function wire() {
+        const sentinel = document.getElementById('scroll-sentinel');
+        if (!sentinel || sentinel.dataset._scrollWired || !window.IntersectionObserver) return;
+        const io = new IntersectionObserver((entries) => {
+            const grid = document.getElementById('page-content');
+            if (!entries.some((e) => e.isIntersecting) || !grid || !grid.children.length) return;
+            const now = Date.now();
+            if (now - lastRequest < MIN_INTERVAL_MS) return;
+            lastRequest = now;
+            const btn = document.getElementById('load-more-button');
+            if (btn) btn.click();
+        }, { rootMargin: '600px 0px' });  // start loading before the user hits the bottom
+        io.observe(sentinel);
+        sentinel.dataset._scrollWired = '1';
+    }
+    const obs = new MutationObserver(wire);
+    obs.observe(document.documentElement, { childList: true, subtree: true });
+    document.addEventListener('DOMContentLoaded', wire);
+})();
+
+// Appends a loaded page (the next-page store) unless a newer search has replaced the results meanwhile
+window.dash_clientside = window.dash_clientside || {};
+Object.assign(window.dash_clientside, {
+    results: {
+        appendPage: function (page, state, current) {
+            const skip = window.dash_clientside.no_update;
+            if (!page || !state || page.search !== state.search) {
+                return [skip, skip, skip];
+            }
+            const existing = Array.isArray(current) ? current : (current ? [current] : []);
+            return [
+                page.cards ? existing.concat(page.cards) : skip,
+                page.state,
+                page.payload || skip
+            ];
+        }
+    }
+});
@@ -0,0 +1,15 @@
+// PER-TAB SESSION ID: kept in sessionStorage by dcc.Store(id='session-id'), so it
+// survives reloads but differs between tabs, browsers and users.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    session: {
+        ensureId: function (_pathname, current) {
+            if (current) {
+                return window.dash_clientside.no_update;
+            }
+            if (window.crypto && window.crypto.randomUUID) {
+                return window.crypto.randomUUID();
+            }
+            return Date.now().toString(36) + Math.random().toString(36).slice(2);
+        }
+    }
+});
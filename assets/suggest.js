@@ -0,0 +1,54 @@
+// TYPEAHEAD: debounced lookups against /api/suggest, rendered into a <datalist>
+(function wireSuggestions() {
+    const DEBOUNCE_MS = 120;
+    let timer = null;
+    let lastPrefix = null;
+    let controller = null;
+
+    function currentUser() {
+        const el = document.getElementById('firebase-user');
+        return el && el.innerText ? el.innerText : '';
+    }
+
+    function render(list, queries) {
+        list.replaceChildren(...queries.map((q) => {
+            const opt = document.createElement('option');
+            opt.value = q;
+            return opt;
+        }));
+    }
+
+    function lookup(input, list) {
+        const prefix = input.value.trim();
+        if (prefix === lastPrefix) return;
+        lastPrefix = prefix;
+        if (!prefix) {
+            render(list, []);
+            return;
+        }
+        if (controller) controller.abort();  // only the latest keystroke matters
+        controller = new AbortController();
+        fetch('/api/suggest?q=' + encodeURIComponent(prefix), {
+            headers: { 'X-Firebase-User': currentUser() },
+            signal: controller.signal
+        })
+            .then((resp) => resp.ok ? resp.json() : [])
+            .then((queries) => render(list, queries))
+            .catch(() => {});
+    }
+
+    function wire() {
+        const input = document.getElementById('search-input-hero');
+        const list = document.getElementById('search-suggestions');
+        if (input && list && !input.dataset._suggestWired) {
+            input.addEventListener('input', () => {
+                clearTimeout(timer);
+                timer = setTimeout(() => lookup(input, list), DEBOUNCE_MS);
+            });
+            input.dataset._suggestWired = '1';
+        }
+    }
+    const obs = new MutationObserver(wire);
+    obs.observe(document.documentElement, { childList: true, subtree: true });
+    document.addEventListener('DOMContentLoaded', wire);
+})();
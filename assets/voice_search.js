@@ -0,0 +1,45 @@
+// VOICE SEARCH: Web Speech API
+(function wireVoice() {
+    const micBtnId = 'voice-search-btn-hero';
+    function startRecognition() {
+        const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
+        if (!SpeechRecognition) {
+            alert('Speech Recognition API not supported in this browser.');
+            return;
+        }
+        const rec = new SpeechRecognition();
+        rec.lang = 'en-US';
+        rec.interimResults = false;
+        rec.maxAlternatives = 1;
+        rec.onresult = (ev) => {
+            const text = ev.results[0][0].transcript || '';
+            const voiceEl = document.getElementById('voice-search-output');
+            if (voiceEl) {
+                voiceEl.innerText = text;
+            }
+            const input = document.getElementById('search-input-hero');
+            const searchBtn = document.getElementById('search-button-hero');
+            if (input) input.value = text;
+            if (searchBtn) searchBtn.click();
+        };
+        rec.onerror = (e) => {
+            console.error('Speech recognition error', e);
+            alert('Voice recognition failed. See console for details.');
+        };
+        rec.start();
+    }
+
+    function wire() {
+        const btn = document.getElementById(micBtnId);
+        if (btn && !btn.dataset._wired) {
+            btn.addEventListener('click', (e) => {
+                e.preventDefault();
+                startRecognition();
+            });
+            btn.dataset._wired = '1';
+        }
+    }
+    const obs = new MutationObserver(wire);
+    obs.observe(document.body, { childList: true, subtree: true });
+    document.addEventListener('DOMContentLoaded', wire);
+})();
@@ -0,0 +1,113 @@
+import hashlib
+import re
+import threading
+import time
+
+import jwt
+import requests
+from cryptography import x509
+
+from cache import TTLCache
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def fetch_google_certs(url=GOOGLE_CERTS_URL):
+    # Returns ({kid: PEM certificate}, seconds the response may be cached).
+    resp = requests.get(url, timeout=5)
+    resp.raise_for_status()
+    match = _MAX_AGE_RE.search(resp.headers.get("Cache-Control", ""))
+    return resp.json(), int(match.group(1)) if match else 3600
+
+
+class CertCache:
+    """Google's token-signing public keys, cached for the max-age Google sends."""
+
+    def __init__(self, fetch=fetch_google_certs, min_refresh_interval=60):
+        self.fetch = fetch
+        self.min_refresh_interval = min_refresh_interval
+        self._keys = {}
+        self._expires_at = 0
+        self._last_fetch = 0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        self._last_fetch = time.monotonic()  # failed attempts count too
+        certs, max_age = self.fetch()
+        self._keys = {
+            kid: x509.load_pem_x509_certificate(pem.encode()).public_key()
+            for kid, pem in certs.items()
+        }
+        self._expires_at = time.monotonic() + max_age
+
+    def get_key(self, kid):
+        with self._lock:
+            now = time.monotonic()
+            expired = now >= self._expires_at
+            # An unknown kid may mean Google rotated keys early, but do not let
+            # forged kids force a fetch on every request.
+            rotated = kid not in self._keys and now - self._last_fetch >= self.min_refresh_interval
+            if expired or rotated:
+                try:
+                    self._refresh()
+                except (requests.exceptions.RequestException, ValueError):
+                    # Back off instead of retrying (with its timeout, under the
+                    # lock) on every sign-in while Google is unreachable.
+                    self._expires_at = max(self._expires_at, now + self.min_refresh_interval)
+            if not self._keys:
+                raise InvalidToken("signing certificates unavailable")
+            return self._keys.get(kid)
+
+
+class TokenVerifier:
+    """Verifies Firebase ID tokens and remembers valid ones until they expire.
+
+    The first check of a token costs one RS256 signature verification; repeat
+    checks are an LRU lookup keyed on the token's SHA-256.
+    """
+
+    def __init__(self, project_id, certs=None, cache_size=10000, leeway=30):
+        self.project_id = project_id
+        self.certs = certs or CertCache()
+        self.leeway = leeway
+        self._verified = TTLCache(maxsize=cache_size, ttl=0, name="verified_tokens")
+
+    def verify(self, token):
+        if not token or not isinstance(token, str) or not self.project_id:
+            raise InvalidToken("missing token or project id")
+        cache_key = hashlib.sha256(token.encode()).digest()
+        claims = self._verified.get(cache_key)
+        if claims is not None:
+            return claims
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            raise InvalidToken(str(e)) from None
+        if header.get("alg") != "RS256":
+            raise InvalidToken("unexpected signing algorithm")
+        key = self.certs.get_key(header.get("kid"))
+        if key is None:
+            raise InvalidToken("unknown signing key")
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=["RS256"],
+                audience=self.project_id,
+                issuer=f"https://securetoken.google.com/{self.project_id}",
+                leeway=self.leeway,
+                options={"require": ["exp", "iat", "sub"]},
+            )
+        except jwt.PyJWTError as e:
+            raise InvalidToken(str(e)) from None
+        if not claims.get("sub"):
+            raise InvalidToken("empty subject")
+
+        self._verified.set(cache_key, claims, ttl=claims["exp"] - time.time())
+        return claims
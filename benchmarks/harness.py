@@ -0,0 +1,58 @@
+"""Environment and Dash request payloads shared by the benchmark scripts."""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def prepare_app_env(upstream_url, workdir=None):
+    # Must run before app is imported: app reads its configuration at import time.
+    # Databases go to a scratch directory so runs neither read nor pollute real state.
+    workdir = workdir or tempfile.mkdtemp(prefix="yt-bench-")
+    os.environ["YOUTUBE_API_BASE_URL"] = upstream_url
+    os.environ.setdefault("YOUTUBE_API_KEY", "stub")
+    os.environ.setdefault("YOUTUBE_DAILY_QUOTA", "1000000000")  # measure the app, not the quota guard
+    os.environ["USER_PREFS_DB"] = os.path.join(workdir, "user_preferences.db")
+    os.environ["RESPONSE_CACHE_DB"] = os.path.join(workdir, "response_cache.db")
+    os.environ["LOCAL_INDEX_DB"] = os.path.join(workdir, "video_index.db")
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    return workdir
+
+
+SEARCH_OUTPUTS = [
+    ("page-content", "children"),
+    ("search-results-header", "children"),
+    ("search-input-hero", "value"),
+    ("results-state", "data"),
+    ("results-payload", "data"),
+]
+
+
+def _search_callback(trigger, query="", n=1, session_id=None):
+    # Mirrors what the browser posts to /_dash-update-component for handle_search.
+    return {
+        "output": ".." + "...".join(f"{i}.{p}" for i, p in SEARCH_OUTPUTS) + "..",
+        "outputs": [{"id": i, "property": p} for i, p in SEARCH_OUTPUTS],
+        "inputs": [
+            {"id": "search-button-hero", "property": "n_clicks", "value": n if trigger == "search" else None},
+            {"id": "search-input-hero", "property": "n_submit", "value": None},
+            {"id": "voice-search-output", "property": "children", "value": None},
+            {"id": "home-button", "property": "n_clicks", "value": n if trigger == "home" else None},
+        ],
+        "changedPropIds": ["search-button-hero.n_clicks" if trigger == "search" else "home-button.n_clicks"],
+        "state": [
+            {"id": "search-input-hero", "property": "value", "value": query},
+            {"id": "firebase-user", "property": "children", "value": None},
+            {"id": "session-id", "property": "data", "value": session_id},
+        ],
+    }
+
+
+def search_payload(query, n=1, session_id=None):
+    return _search_callback("search", query, n, session_id)
+
+
+def home_payload(n=1, session_id=None):
+    return _search_callback("home", "", n, session_id)
@@ -0,0 +1,147 @@
+"""Load generator for the search and Home callbacks.
+
+Posts the same /_dash-update-component requests a browser sends for
+handle_search (search button) and the Home trending view. By default it
+starts the stub API and drives app.py in-process through the Flask test
+client; with --url it drives a running server over HTTP instead. In that case
+start benchmarks/stub_server.py and point the server at it yourself.
+
+    python benchmarks/load.py --concurrency 8 --duration 20 --latency-ms 80
+    python benchmarks/load.py --url http://127.0.0.1:8050 --concurrency 32
+"""
+import argparse
+import random
+import threading
+import time
+
+import harness
+import reporting
+import stub_server
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"search", "home"}
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown request kinds: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def make_poster(url):
+    if url:
+        import requests
+
+        session = requests.Session()
+
+        def post(payload, headers):
+            resp = session.post(f"{url.rstrip('/')}/_dash-update-component", json=payload, headers=headers, timeout=60)
+            return resp.status_code
+    else:
+        import app
+
+        client = app.server.test_client()
+
+        def post(payload, headers):
+            return client.post("/_dash-update-component", json=payload, headers=headers).status_code
+    return post
+
+
+def worker(n, args, queries, weights, deadline, results, lock):
+    post = make_poster(args.url)
+    # A distinct tab id per simulated user, so the app's duplicate-trigger
+    # coalescing only merges repeats from the same tab, as in production.
+    headers = {"User-Agent": "yt-bench"}
+    session_id = f"bench-{n}"
+    rng = random.Random(args.seed + n)
+    kinds, kind_weights = zip(*args.mix.items())
+    local = {"search": [], "home": []}
+    errors = {"search": 0, "home": 0}
+    clicks = 0
+    while True:
+        with lock:
+            if results["issued"] >= args.requests or time.perf_counter() >= deadline:
+                break
+            results["issued"] += 1
+        kind = rng.choices(kinds, kind_weights)[0]
+        clicks += 1
+        if kind == "search":
+            payload = harness.search_payload(rng.choices(queries, weights)[0], clicks, session_id)
+        else:
+            payload = harness.home_payload(clicks, session_id)
+        start = time.perf_counter()
+        try:
+            status = post(payload, headers)
+        except Exception:
+            status = None
+        elapsed = time.perf_counter() - start
+        if status == 200:
+            local[kind].append(elapsed)
+        else:
+            errors[kind] += 1
+    with lock:
+        for kind in local:
+            results[kind] += local[kind]
+            results[f"{kind}_errors"] += errors[kind]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test handle_search and the Home view")
+    parser.add_argument("--url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds to run")
+    parser.add_argument("--requests", type=int, default=10 ** 9, help="stop after this many requests")
+    parser.add_argument("--warmup", type=int, default=20, help="requests sent and discarded first")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("search=0.8,home=0.2"))
+    parser.add_argument("--queries", type=int, default=200,
+                        help="distinct queries; picked Zipf-like so a few are hot, as in real traffic")
+    parser.add_argument("--latency-ms", type=float, default=60, help="stub API base latency")
+    parser.add_argument("--jitter-ms", type=float, default=40, help="stub API extra random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub API failure rate")
+    parser.add_argument("--seed", type=int, default=1)
+    reporting.add_arguments(parser)
+    args = parser.parse_args()
+
+    stub = None
+    if not args.url:
+        stub = stub_server.start(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+        harness.prepare_app_env(stub_server.base_url(stub))
+
+    queries = [f"benchmark query {i}" for i in range(args.queries)]
+    weights = [1 / (i + 1) for i in range(args.queries)]
+
+    if args.warmup:
+        post = make_poster(args.url)
+        for i in range(args.warmup):
+            post(harness.search_payload(queries[i % len(queries)], i + 1), {"User-Agent": "yt-bench/warmup"})
+        post(harness.home_payload(), {"User-Agent": "yt-bench/warmup"})
+
+    results = {"issued": 0, "search": [], "home": [], "search_errors": 0, "home_errors": 0}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=worker, args=(n, args, queries, weights, deadline, results, lock))
+               for n in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    rows = [reporting.summarize(kind, results[kind], elapsed, results[f"{kind}_errors"])
+            for kind in ("search", "home") if results[kind] or results[f"{kind}_errors"]]
+    rows.append(reporting.summarize("all", results["search"] + results["home"], elapsed,
+                                    results["search_errors"] + results["home_errors"]))
+    print(f"{args.concurrency} concurrent users for {elapsed:.1f}s")
+    reporting.report(rows, args)
+    if stub is not None:
+        import app
+
+        print(f"upstream calls: {dict(stub.hits)}")
+        print(f"search cache hit ratio: {app.search_cache.stats()['hit_ratio']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
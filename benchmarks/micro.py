@@ -0,0 +1,96 @@
+"""Microbenchmarks for the preference store and result-card building.
+
+    python benchmarks/micro.py                 # everything
+    python benchmarks/micro.py --only db       # db_operations only
+    python benchmarks/micro.py --only cards --save before.json
+"""
+import argparse
+import os
+import random
+import time
+
+import harness
+import reporting
+import stub_server
+
+
+def bench(name, fn, n):
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+    return reporting.summarize(name, latencies)
+
+
+def db_benchmarks(workdir, n, users, history):
+    from db_operations import PreferenceStore
+
+    store = PreferenceStore(os.path.join(workdir, "micro_prefs.db"))
+    rng = random.Random(1)
+    user_ids = [f"user{i}@example.com" for i in range(users)]
+    words = ["lofi", "jazz", "piano", "rain", "study", "coding", "chill", "beats", "live", "mix"]
+    now = time.time()
+    # Seed the history the way the write-behind queue would, in batches.
+    searches = [(u, " ".join(rng.sample(words, 2)), now - rng.random() * 86400)
+                for u in user_ids for _ in range(history)]
+    for i in range(0, len(searches), 1000):
+        store.apply_batch({}, searches[i:i + 1000])
+
+    def pick(i):
+        return user_ids[(i * 7919) % users]
+
+    batch = [(pick(i), "batched query", now) for i in range(200)]
+    return [
+        bench("db.get_user_preferences", lambda i: store.get_user_preferences(pick(i)), n),
+        bench("db.update_dark_mode", lambda i: store.update_user_preferences(pick(i), dark_mode=i % 2), n),
+        bench("db.record_search", lambda i: store.record_search(pick(i), words[i % 10]), n),
+        bench("db.recent_searches", lambda i: store.recent_searches(pick(i), 10), n),
+        bench("db.recent_distinct", lambda i: store.recent_searches(pick(i), 10, distinct=True), n),
+        bench("db.top_queries_user", lambda i: store.top_queries(10, user_id=pick(i)), n),
+        bench("db.top_queries_global", lambda i: store.top_queries(10), max(1, n // 20)),
+        bench("db.apply_batch_200", lambda i: store.apply_batch({pick(i): True}, batch), max(1, n // 20)),
+    ]
+
+
+def card_benchmarks(n):
+    import app
+    from dash._utils import to_json
+    from enrichment import format_duration, format_views
+
+    search = stub_server.load_fixture("search")["items"]
+    trending = stub_server.load_fixture("trending")["items"]
+    # Warm the metadata cache from the fixture so card building never goes upstream.
+    for item in stub_server.load_fixture("videos")["items"]:
+        app.enricher.cache.set(item["id"], {"duration": format_duration(item["contentDetails"]["duration"]),
+                                            "views": format_views(item["statistics"]["viewCount"])})
+    cards = app.result_cols(search, "search")
+    return [
+        bench("cards.result_cols_search", lambda i: app.result_cols(search, "search"), n),
+        bench("cards.result_cols_trending", lambda i: app.result_cols(trending, "trending"), n),
+        bench("cards.compact_results", lambda i: app.compact_results(search, "search"), n),
+        bench("cards.serialize", lambda i: to_json(cards), n),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for db_operations and card building")
+    parser.add_argument("--only", choices=("db", "cards"))
+    parser.add_argument("-n", type=int, default=2000, help="iterations per benchmark")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--history", type=int, default=50, help="seeded searches per user")
+    reporting.add_arguments(parser)
+    args = parser.parse_args()
+
+    stub = stub_server.start()
+    workdir = harness.prepare_app_env(stub_server.base_url(stub))
+    rows = []
+    if args.only in (None, "db"):
+        rows += db_benchmarks(workdir, args.n, args.users, args.history)
+    if args.only in (None, "cards"):
+        rows += card_benchmarks(args.n)
+    reporting.report(rows, args)
+
+
+if __name__ == "__main__":
+    main()
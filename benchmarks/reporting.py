@@ -0,0 +1,62 @@
+"""Latency summaries shared by the benchmark scripts."""
+import json
+import math
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile of an already sorted list.
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(name, latencies, elapsed=None, errors=0):
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "name": name,
+        "count": count,
+        "errors": errors,
+        "throughput": count / elapsed if elapsed else (count / sum(values) if values and sum(values) else 0.0),
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "max_ms": (values[-1] if values else 0.0) * 1000,
+    }
+
+
+def print_table(rows, baseline=None):
+    # baseline: {name: row} from an earlier --save; adds the p50/p99 change.
+    print(f"{'benchmark':<28}{'n':>8}{'err':>6}{'ops/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for row in rows:
+        line = (f"{row['name']:<28}{row['count']:>8}{row['errors']:>6}{row['throughput']:>11.1f}"
+                f"{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['max_ms']:>10.3f}")
+        before = (baseline or {}).get(row["name"])
+        if before and before["p50_ms"] and before["p99_ms"]:
+            line += (f"   p50 {100 * (row['p50_ms'] / before['p50_ms'] - 1):+.0f}%"
+                     f" p99 {100 * (row['p99_ms'] / before['p99_ms'] - 1):+.0f}%")
+        print(line)
+
+
+def save(path, rows):
+    with open(path, "w") as f:
+        json.dump({row["name"]: row for row in rows}, f, indent=1)
+
+
+def load_baseline(path):
+    if not path:
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def add_arguments(parser):
+    parser.add_argument("--save", metavar="JSON", help="write results for a later --compare")
+    parser.add_argument("--compare", metavar="JSON", help="show changes against saved results")
+
+
+def report(rows, args):
+    print_table(rows, load_baseline(args.compare))
+    if args.save:
+        save(args.save, rows)
@@ -0,0 +1,62 @@
+"""Cold-start timings for app.py.
+
+Each run is a fresh interpreter that imports app, then serves the first
+requests a browser makes (index page, layout, dependencies) through the Flask
+test client. Run from the repo root with the app's environment loaded:
+
+    python benchmarks/startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+client = app.server.test_client()
+first = client.get("/")
+t2 = time.perf_counter()
+client.get("/_dash-layout")
+client.get("/_dash-dependencies")
+t3 = time.perf_counter()
+print(json.dumps({
+    "import": t1 - t0,
+    "first_response": t2 - t1,
+    "page_ready": t3 - t1,
+    "status": first.status_code,
+}))
+"""
+
+
+def run_once():
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    if any(r["status"] != 200 for r in runs):
+        sys.exit(f"index page failed: {[r['status'] for r in runs]}")
+    for key in ("import", "first_response", "page_ready"):
+        values = [r[key] * 1000 for r in runs]
+        print(f"{key:>15}: median {statistics.median(values):7.1f} ms"
+              f"   min {min(values):7.1f} ms   max {max(values):7.1f} ms")
+    total = [(r["import"] + r["first_response"]) * 1000 for r in runs]
+    print(f"{'cold start':>15}: median {statistics.median(total):7.1f} ms  (import + first response)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Local stand-in for the YouTube Data API v3, replaying recorded fixtures.
+
+Serves search, videos (chart=mostPopular) and videos (id=...) from
+benchmarks/fixtures with configurable latency and error rate, so the app can
+be load-tested without spending quota:
+
+    python benchmarks/stub_server.py --port 8765 --latency-ms 80 --error-rate 0.01
+    YOUTUBE_API_BASE_URL=http://127.0.0.1:8765 YOUTUBE_API_KEY=stub python app.py
+
+Video ids are rewritten per query and page, so distinct queries produce
+distinct results (and distinct cache entries) from the same fixture.
+Refresh the fixtures from the live API with --record.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, f"{name}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _rewrite_id(vid, salt):
+    return vid[:5] + hashlib.blake2b(f"{vid}|{salt}".encode(), digest_size=6).hexdigest()[:6]
+
+
+class StubAPI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=503, pages=10):
+        super().__init__(address, StubHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.pages = pages
+        self.search = load_fixture("search")
+        self.trending = load_fixture("trending")
+        self.details = load_fixture("videos")["items"]
+        self.hits = Counter()
+        self.scripted = deque()  # (status, headers) to answer the next requests with, for tests
+        self.last_request = None  # (endpoint, query params, request headers)
+        self._lock = threading.Lock()
+
+    def count(self, key):
+        with self._lock:
+            self.hits[key] += 1
+
+    def page(self, fixture, salt, page_token, max_results):
+        page = int(page_token[1:]) if page_token and page_token.startswith("P") else 0
+        items = []
+        for i in range(max_results):
+            item = json.loads(json.dumps(fixture["items"][i % len(fixture["items"])]))
+            if isinstance(item["id"], dict):
+                item["id"]["videoId"] = _rewrite_id(item["id"]["videoId"], f"{salt}|{page}|{i}")
+            else:
+                item["id"] = _rewrite_id(item["id"], f"{salt}|{page}|{i}")
+            items.append(item)
+        data = {"items": items}
+        if page + 1 < self.pages:
+            data["nextPageToken"] = f"P{page + 1}"
+        return data
+
+    def video_details(self, ids):
+        items = []
+        for vid in ids:
+            item = dict(self.details[int(hashlib.md5(vid.encode()).hexdigest(), 16) % len(self.details)])
+            item["id"] = vid
+            items.append(item)
+        return {"items": items}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, data, headers=()):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        # Like the real API: gzip only when the User-Agent also asks for it.
+        if "gzip" in self.headers.get("Accept-Encoding", "") and "gzip" in self.headers.get("User-Agent", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        srv = self.server
+        url = urllib.parse.urlparse(self.path)
+        qs = dict(urllib.parse.parse_qsl(url.query))
+        endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+        kind = "trending" if qs.get("chart") else endpoint
+        srv.count(kind)
+        srv.last_request = (endpoint, qs, dict(self.headers))
+
+        if srv.latency_ms or srv.jitter_ms:
+            time.sleep((srv.latency_ms + random.uniform(0, srv.jitter_ms)) / 1000)
+        try:
+            status, headers = srv.scripted.popleft()
+        except IndexError:
+            pass
+        else:
+            srv.count(f"{kind}:error")
+            self.send_json(status, {"error": {"code": status, "message": "scripted error"}}, headers)
+            return
+        if srv.error_rate and random.random() < srv.error_rate:
+            srv.count(f"{kind}:error")
+            self.send_json(srv.error_status, {"error": {"code": srv.error_status, "message": "stub error"}})
+            return
+
+        max_results = int(qs.get("maxResults", 20))
+        if kind == "search":
+            self.send_json(200, srv.page(srv.search, qs.get("q", ""), qs.get("pageToken"), max_results))
+        elif kind == "trending":
+            etag = srv.trending["etag"]
+            if not qs.get("pageToken") and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            data = srv.page(srv.trending, qs.get("regionCode", ""), qs.get("pageToken"), max_results)
+            data["etag"] = etag
+            self.send_json(200, data, [("ETag", etag)])
+        elif kind == "videos":
+            ids = [i for i in qs.get("id", "").split(",") if i]
+            self.send_json(200, srv.video_details(ids))
+        else:
+            self.send_json(404, {"error": {"code": 404, "message": f"no stub for {url.path}"}})
+
+
+def start(port=0, **options):
+    # In-process use: returns the running server; its URL is base_url(server).
+    server = StubAPI(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, name="stub-api", daemon=True).start()
+    return server
+
+
+def base_url(server):
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def record(api_key, query, region):
+    # Capture fresh fixtures from the live API with the same field projections the app uses.
+    sys.path.insert(0, ROOT)
+    from youtube_client import API_BASE_URL, DETAILS_FIELDS, SEARCH_FIELDS, TRENDING_FIELDS
+    import requests
+
+    def get(endpoint, params):
+        resp = requests.get(f"{API_BASE_URL}/{endpoint}", params=dict(params, key=api_key), timeout=15)
+        resp.raise_for_status()
+        return resp.json()
+
+    search = get("search", {"part": "snippet", "q": query, "type": "video", "maxResults": 20,
+                            "fields": SEARCH_FIELDS})
+    trending = get("videos", {"part": "snippet", "chart": "mostPopular", "maxResults": 20,
+                              "regionCode": region, "fields": TRENDING_FIELDS})
+    ids = [it["id"]["videoId"] for it in search["items"]] + [it["id"] for it in trending["items"]]
+    details = {"items": []}
+    for i in range(0, len(ids), 50):
+        details["items"] += get("videos", {"part": "contentDetails,statistics", "id": ",".join(ids[i:i + 50]),
+                                           "fields": DETAILS_FIELDS})["items"]
+    for name, data in (("search", search), ("trending", trending), ("videos", details)):
+        with open(os.path.join(FIXTURES, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, ensure_ascii=False)
+    print(f"recorded {len(search['items'])} search, {len(trending['items'])} trending, "
+          f"{len(details['items'])} video details into {FIXTURES}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local YouTube Data API stand-in")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="base delay per response")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="extra uniform random delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of responses that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--pages", type=int, default=10, help="pages per query before nextPageToken stops")
+    parser.add_argument("--record", action="store_true", help="refresh fixtures from the live API and exit")
+    parser.add_argument("--api-key", default=os.getenv("YOUTUBE_API_KEY"))
+    parser.add_argument("--query", default="lofi")
+    parser.add_argument("--region", default="IN")
+    args = parser.parse_args()
+
+    if args.record:
+        if not args.api_key:
+            sys.exit("--record needs --api-key or YOUTUBE_API_KEY")
+        record(args.api_key, args.query, args.region)
+        return
+
+    server = StubAPI(("127.0.0.1", args.port), latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                     error_rate=args.error_rate, error_status=args.error_status, pages=args.pages)
+    print(f"stub YouTube API on {base_url(server)} (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(dict(server.hits))
+
+
+if __name__ == "__main__":
+    main()
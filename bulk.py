@@ -0,0 +1,54 @@
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class BulkRunner:
+    """Runs a long batch of calls on a shared, bounded pool, yielding results as they finish.
+
+    Each batch keeps at most `window` calls submitted but not yet yielded, so
+    memory stays flat however many items it has, and the pool size caps
+    upstream concurrency across all batches running at once.
+    """
+
+    def __init__(self, workers=4, window=8):
+        self.workers = workers
+        self.window = window
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    def _executor(self):
+        # Created on first use, and again in a forked child where its threads are gone.
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="bulk")
+                self._pid = os.getpid()
+            return self._pool
+
+    def run(self, fn, items, window=None):
+        # Yields (index, item, result, error) in completion order; exactly one of
+        # result/error is meaningful. Closing the generator early (e.g. the
+        # client went away) cancels whatever has not started yet.
+        executor = self._executor()
+        window = window or self.window
+        source = enumerate(items)
+        pending = {}
+        try:
+            while True:
+                for index, item in source:
+                    pending[executor.submit(fn, item)] = (index, item)
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, item = pending.pop(future)
+                    try:
+                        yield index, item, future.result(), None
+                    except Exception as e:
+                        yield index, item, None, e
+        finally:
+            for future in pending:
+                future.cancel()
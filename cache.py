@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_query(query):
+    return " ".join(str(query or "").lower().split())
+
+
+class TTLCache:
+    """Bounded, thread-safe LRU cache with per-entry TTL and stale-while-revalidate.
+
+    An optional l2 (e.g. disk_cache.DiskCache) is consulted on misses and
+    written through on every set, under the cache's name as namespace.
+    """
+
+    def __init__(self, maxsize=512, ttl=300, stale_ttl=0, l2=None, name="cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.l2 = l2
+        self.name = name
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.l2_hits = 0
+        self.evictions = 0
+
+    def _lookup(self, key, now):
+        # Returns (value, is_stale) or None; caller holds the lock.
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if now < expires_at:
+            self._data.move_to_end(key)
+            return value, False
+        if now < expires_at + self.stale_ttl:
+            self._data.move_to_end(key)
+            return value, True
+        del self._data[key]
+        return None
+
+    def get(self, key, default=None):
+        with self._lock:
+            found = self._lookup(key, time.monotonic())
+            if found is None or found[1]:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return found[0]
+
+    def _store(self, key, value, ttl):
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self._store(key, value, ttl)
+        if self.l2 is not None:
+            self.l2.set(self.name, key, value, ttl, self.stale_ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_or_load(self, key, loader, refresh=None):
+        """Return the cached value for key, calling loader() on a miss.
+
+        Stale entries are served immediately while a single background
+        thread reloads them with refresh() (loader() if not given).
+        """
+        refresh = refresh or loader
+        with self._lock:
+            found = self._lookup(key, time.monotonic())
+            if found is not None:
+                value, is_stale = found
+                if not is_stale:
+                    self.hits += 1
+                    return value
+                self.stale_hits += 1
+                self._schedule_refresh(key, refresh)
+                return value
+            self.misses += 1
+
+        if self.l2 is not None:
+            found = self.l2.get(self.name, key)
+            if found is not None:
+                # Another process (or a previous run) already paid for this one.
+                value, expires_at = found
+                remaining = expires_at - time.time()
+                self._store(key, value, remaining)
+                with self._lock:
+                    self.l2_hits += 1
+                    if remaining <= 0:
+                        self._schedule_refresh(key, refresh)
+                return value
+
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def _schedule_refresh(self, key, loader):
+        # Caller holds the lock.
+        if key not in self._refreshing:
+            self._refreshing.add(key)
+            threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+
+    def _refresh(self, key, loader):
+        try:
+            self.set(key, loader())
+        except Exception:
+            pass  # keep serving the stale copy until it ages out
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self):
+        with self._lock:
+            size = len(self._data)
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "l2_hits": self.l2_hits,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.stale_hits + self.l2_hits) / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
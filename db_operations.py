@@ -1,48 +1,362 @@
+import atexit
+import os
 import sqlite3
+import threading
+import time
 from datetime import datetime
 
+from metrics import registry
+
+DB_PATH = os.getenv("USER_PREFS_DB", "user_preferences.db")
+# Searches kept per user; older rows are trimmed as new ones arrive
+HISTORY_RETENTION = int(os.getenv("SEARCH_HISTORY_RETENTION", "50"))
+# Searches returned in get_user_preferences()['search_history']
+HISTORY_PREVIEW = 10
+
+SQLITE_LATENCY = registry.histogram("sqlite_op_seconds", "Latency of preference store operations", ("op",))
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",   # durable across app crashes; WAL makes this safe
+    "PRAGMA cache_size=-8000",     # 8 MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+UPSERT_PREFERENCES = """
+    INSERT INTO users (user_id, dark_mode, created_at)
+    VALUES (:user_id, COALESCE(:dark_mode, 0), :now)
+    ON CONFLICT(user_id) DO UPDATE SET
+        dark_mode = COALESCE(:dark_mode, users.dark_mode)
+"""
+
+INSERT_SEARCH = "INSERT INTO search_history (user_id, query, ts) VALUES (?, ?, ?)"
+
+# Keeps the user's :keep newest rows, dropping the (:keep + 1)-th newest and older;
+# the (user_id, ts) index makes this a bounded range scan regardless of table size.
+TRIM_HISTORY = """
+    DELETE FROM search_history
+    WHERE user_id = :user_id AND ts <= (
+        SELECT ts FROM search_history WHERE user_id = :user_id
+        ORDER BY ts DESC LIMIT 1 OFFSET :keep
+    )
+"""
+
+
+class ThreadConnections:
+    """One reusable SQLite connection per thread, set up with `pragmas`.
+
+    Connections must not cross a fork, so they are keyed on the pid as well.
+    setup(conn) runs once, on the first connection, so creating the object
+    (or forking a preloaded master) never touches the database file.
+    """
+
+    def __init__(self, path, setup=None, pragmas=PRAGMAS, cached_statements=128):
+        self.path = path
+        self.setup = setup
+        self.pragmas = pragmas
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def get(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, cached_statements=self.cached_statements)
+            for pragma in self.pragmas:
+                conn.execute(pragma)
+            if not self._initialized:
+                with self._lock:
+                    if not self._initialized and self.setup is not None:
+                        self.setup(conn)
+                    self._initialized = True
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class PreferenceStore:
+    """SQLite-backed user preferences with one reusable connection per thread.
+
+    The schema is created on the first connection, so importing the module
+    (or forking a preloaded master) never touches the database file.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._connections = ThreadConnections(path, self._create_schema)
+
+    def connection(self):
+        return self._connections.get()
+
+    def close(self):
+        self._connections.close()
+
+    def init_db(self):
+        self.connection()
+
+    def _create_schema(self, conn):
+        with conn:
+            # Take the write lock up front: workers connecting for the first time
+            # at once must not both read the legacy column and both migrate it.
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute('''CREATE TABLE IF NOT EXISTS users
+                         (user_id TEXT PRIMARY KEY,
+                          dark_mode INTEGER,
+                          search_history TEXT,
+                          created_at TIMESTAMP)''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS search_history
+                         (id INTEGER PRIMARY KEY,
+                          user_id TEXT NOT NULL,
+                          query TEXT NOT NULL,
+                          ts REAL NOT NULL)''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_search_history_user_ts ON search_history (user_id, ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_search_history_query ON search_history (query)")
+            self._migrate_history(conn)
+
+    def _migrate_history(self, conn):
+        # users.search_history used to hold a '|'-joined blob; move it into rows once.
+        rows = conn.execute(
+            "SELECT user_id, search_history FROM users WHERE COALESCE(search_history, '') != ''"
+        ).fetchall()
+        if not rows:
+            return
+        base = time.time() - 1
+        for user_id, history in rows:
+            queries = [q for q in history.split('|') if q][-HISTORY_RETENTION:]
+            # Spread synthetic timestamps so the original order is preserved.
+            conn.executemany(INSERT_SEARCH, [
+                (user_id, q, base - (len(queries) - i) * 1e-3) for i, q in enumerate(queries)
+            ])
+        conn.execute("UPDATE users SET search_history = NULL WHERE search_history IS NOT NULL")
+
+    @SQLITE_LATENCY.timed("get_user_preferences")
+    def get_user_preferences(self, user_id):
+        result = self.connection().execute(
+            "SELECT user_id, dark_mode, created_at FROM users WHERE user_id=?",
+            (user_id,),
+        ).fetchone()
+
+        if result:
+            return {
+                'user_id': result[0],
+                'dark_mode': bool(result[1]),
+                'search_history': self.recent_searches(user_id, HISTORY_PREVIEW)[::-1],
+                'created_at': result[2]
+            }
+        return None
+
+    @SQLITE_LATENCY.timed("update_user_preferences")
+    def update_user_preferences(self, user_id, dark_mode=None, search_query=None):
+        conn = self.connection()
+        with conn:
+            conn.execute(UPSERT_PREFERENCES, {
+                "user_id": user_id,
+                "dark_mode": None if dark_mode is None else int(bool(dark_mode)),
+                "now": datetime.now(),
+            })
+            if search_query:
+                self._append_search(conn, user_id, search_query)
+
+    def _append_search(self, conn, user_id, query, ts=None):
+        conn.execute(INSERT_SEARCH, (user_id, query, time.time() if ts is None else ts))
+        conn.execute(TRIM_HISTORY, {"user_id": user_id, "keep": HISTORY_RETENTION})
+
+    @SQLITE_LATENCY.timed("record_search")
+    def record_search(self, user_id, query):
+        conn = self.connection()
+        with conn:
+            self._append_search(conn, user_id, query)
+
+    @SQLITE_LATENCY.timed("apply_batch")
+    def apply_batch(self, dark_modes, searches):
+        # dark_modes: {user_id: bool}; searches: [(user_id, query, ts)]. One transaction.
+        conn = self.connection()
+        now = datetime.now()
+        with conn:
+            conn.executemany(UPSERT_PREFERENCES, [
+                {"user_id": user_id, "dark_mode": int(bool(dark_mode)), "now": now}
+                for user_id, dark_mode in dark_modes.items()
+            ])
+            users = {user_id for user_id, _, _ in searches} - dark_modes.keys()
+            conn.executemany(UPSERT_PREFERENCES, [
+                {"user_id": user_id, "dark_mode": None, "now": now} for user_id in users
+            ])
+            conn.executemany(INSERT_SEARCH, searches)
+            conn.executemany(TRIM_HISTORY, [
+                {"user_id": user_id, "keep": HISTORY_RETENTION}
+                for user_id in {user_id for user_id, _, _ in searches}
+            ])
+
+    @SQLITE_LATENCY.timed("recent_searches")
+    def recent_searches(self, user_id, limit=10, distinct=False):
+        # Newest first.
+        if distinct:
+            sql = ("SELECT query FROM search_history WHERE user_id=? "
+                   "GROUP BY query ORDER BY MAX(ts) DESC LIMIT ?")
+        else:
+            sql = "SELECT query FROM search_history WHERE user_id=? ORDER BY ts DESC, id DESC LIMIT ?"
+        return [row[0] for row in self.connection().execute(sql, (user_id, limit))]
+
+    @SQLITE_LATENCY.timed("top_queries")
+    def top_queries(self, limit=10, user_id=None):
+        # Returns [(query, count)], most frequent first; global when user_id is None.
+        if user_id is None:
+            rows = self.connection().execute(
+                "SELECT query, COUNT(*) AS n FROM search_history GROUP BY query ORDER BY n DESC LIMIT ?",
+                (limit,),
+            )
+        else:
+            rows = self.connection().execute(
+                "SELECT query, COUNT(*) AS n FROM search_history WHERE user_id=? "
+                "GROUP BY query ORDER BY n DESC LIMIT ?",
+                (user_id, limit),
+            )
+        return rows.fetchall()
+
+    @SQLITE_LATENCY.timed("shared_queries")
+    def shared_queries(self, limit=10, min_users=3):
+        # Returns [(query, distinct users)] for queries at least min_users people searched.
+        return self.connection().execute(
+            "SELECT query, COUNT(DISTINCT user_id) AS users FROM search_history "
+            "GROUP BY query HAVING users >= ? ORDER BY users DESC LIMIT ?",
+            (min_users, limit),
+        ).fetchall()
+
+
+class WriteBehindQueue:
+    """Buffers preference and history writes and flushes them to the store in batches.
+
+    A flush happens when max_batch writes are pending or every interval seconds,
+    whichever comes first, and once more at interpreter exit.
+    """
+
+    def __init__(self, store, max_batch=200, interval=1.0):
+        self.store = store
+        self.max_batch = max_batch
+        self.interval = interval
+        self._dark_modes = {}  # user_id -> latest value; repeated toggles collapse
+        self._searches = []    # (user_id, query, ts)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self.flushed = 0
+        self.failures = 0
+
+    def _pending(self):
+        return len(self._dark_modes) + len(self._searches)
+
+    def _ensure_started(self):
+        # Started lazily, and again in a forked child where the thread does not survive.
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        if self._pid is not None and self._pid != os.getpid():
+            self._take()  # writes inherited across fork are flushed by the parent
+        self._pid = os.getpid()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+        self._thread.start()
+
+    def update_user_preferences(self, user_id, dark_mode=None, search_query=None):
+        with self._cond:
+            self._ensure_started()
+            if dark_mode is not None:
+                self._dark_modes[user_id] = bool(dark_mode)
+            if search_query:
+                self._searches.append((user_id, search_query, time.time()))
+            if self._pending() >= self.max_batch:
+                self._cond.notify()
+
+    def set_dark_mode(self, user_id, dark_mode):
+        self.update_user_preferences(user_id, dark_mode=dark_mode)
+
+    def record_search(self, user_id, query):
+        self.update_user_preferences(user_id, search_query=query)
+
+    def _take(self):
+        dark_modes, searches = self._dark_modes, self._searches
+        self._dark_modes, self._searches = {}, []
+        return dark_modes, searches
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping or self._pending() >= self.max_batch, self.interval)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def flush(self):
+        with self._cond:
+            dark_modes, searches = self._take()
+        if not dark_modes and not searches:
+            return
+        try:
+            self.store.apply_batch(dark_modes, searches)
+            self.flushed += len(dark_modes) + len(searches)
+        except sqlite3.Error:
+            self.failures += 1
+            with self._cond:
+                # Put the batch back; newer dark-mode values win over the failed ones.
+                self._dark_modes = {**dark_modes, **self._dark_modes}
+                self._searches = searches + self._searches
+
+    def stop(self, timeout=5.0):
+        with self._cond:
+            if self._thread is None or self._pid != os.getpid():
+                return
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+
+store = PreferenceStore()
+write_queue = WriteBehindQueue(
+    store,
+    max_batch=int(os.getenv("DB_WRITE_BATCH", "200")),
+    interval=float(os.getenv("DB_WRITE_INTERVAL", "1.0")),
+)
+atexit.register(write_queue.stop)
+registry.collected("db_write_pending", "Writes buffered in the write-behind queue", (),
+                   lambda: [((), write_queue._pending())])
+registry.collected("db_writes_flushed_total", "Writes flushed to SQLite by the write-behind queue", (),
+                   lambda: [((), write_queue.flushed)], kind="counter")
+registry.collected("db_write_failures_total", "Write-behind batches that failed and were re-queued", (),
+                   lambda: [((), write_queue.failures)], kind="counter")
+
+
+def init_db():
+    store.init_db()
+
 
 def get_user_preferences(user_id):
-    conn = sqlite3.connect('user_preferences.db')
-    c = conn.cursor()
-    c.execute("SELECT * FROM users WHERE user_id=?", (user_id,))
-    result = c.fetchone()
-    conn.close()
-
-    if result:
-        return {
-            'user_id': result[0],
-            'dark_mode': bool(result[1]),
-            'search_history': result[2].split('|') if result[2] else [],
-            'created_at': result[3]
-        }
-    return None
+    return store.get_user_preferences(user_id)
 
 
 def update_user_preferences(user_id, dark_mode=None, search_query=None):
-    conn = sqlite3.connect('user_preferences.db')
-    c = conn.cursor()
+    store.update_user_preferences(user_id, dark_mode=dark_mode, search_query=search_query)
 
-    user = get_user_preferences(user_id)
 
-    if user:
-        new_dark_mode = dark_mode if dark_mode is not None else user['dark_mode']
+def record_search(user_id, query):
+    store.record_search(user_id, query)
 
-        if search_query:
-            updated_history = '|'.join(user['search_history'] + [search_query][-10:])
-        else:
-            updated_history = user['search_history']
-
-        c.execute("""
-            UPDATE users 
-            SET dark_mode=?, search_history=?
-            WHERE user_id=?
-        """, (new_dark_mode, updated_history, user_id))
-    else:
-        c.execute("""
-            INSERT INTO users (user_id, dark_mode, search_history, created_at)
-            VALUES (?, ?, ?, ?)
-        """, (user_id, dark_mode or False, search_query or '', datetime.now()))
-
-    conn.commit()
-    conn.close()
+
+def recent_searches(user_id, limit=10, distinct=False):
+    return store.recent_searches(user_id, limit, distinct=distinct)
+
+
+def top_queries(limit=10, user_id=None):
+    return store.top_queries(limit, user_id=user_id)
+
+
+def shared_queries(limit=10, min_users=3):
+    return store.shared_queries(limit, min_users=min_users)
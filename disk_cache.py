@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from db_operations import PRAGMAS, ThreadConnections
+
+DISK_CACHE_PATH = os.getenv("RESPONSE_CACHE_DB", "response_cache.db")
+
+
+def _encode_key(namespace, key):
+    return f"{namespace}:{json.dumps(key, separators=(',', ':'), default=str)}"
+
+
+class DiskCache:
+    """Cross-process cache of JSON values in SQLite (WAL), zlib-compressed.
+
+    Rows stay readable as stale until stale_until, are evicted oldest-expiry
+    first once the table exceeds max_bytes, and expired rows are purged and
+    the file compacted every maintenance_every writes, on a background thread
+    so no request waits on it.
+    """
+
+    def __init__(self, path=DISK_CACHE_PATH, max_bytes=256 * 1024 * 1024, maintenance_every=500):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.maintenance_every = maintenance_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        # auto_vacuum must precede table creation to take effect on a new file.
+        self._connections = ThreadConnections(path, self._init_schema,
+                                              ("PRAGMA auto_vacuum=INCREMENTAL",) + PRAGMAS, cached_statements=64)
+
+    def connection(self):
+        return self._connections.get()
+
+    def _init_schema(self, conn):
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS responses
+                         (key TEXT PRIMARY KEY,
+                          value BLOB NOT NULL,
+                          size INTEGER NOT NULL,
+                          expires_at REAL NOT NULL,
+                          stale_until REAL NOT NULL)''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_stale_until ON responses (stale_until)")
+
+    def get(self, namespace, key):
+        # Returns (value, expires_at) with expires_at in wall-clock seconds, or None.
+        try:
+            row = self.connection().execute(
+                "SELECT value, expires_at FROM responses WHERE key=? AND stale_until > ?",
+                (_encode_key(namespace, key), time.time()),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0])), row[1]
+
+    def set(self, namespace, key, value, ttl, stale_ttl=0):
+        blob = zlib.compress(json.dumps(value, separators=(',', ':')).encode(), 6)
+        now = time.time()
+        try:
+            conn = self.connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, size, expires_at, stale_until) VALUES (?, ?, ?, ?, ?)",
+                    (_encode_key(namespace, key), blob, len(blob), now + ttl, now + ttl + stale_ttl),
+                )
+        except sqlite3.Error:
+            return  # the disk tier is best-effort
+        with self._lock:
+            self._writes += 1
+            if self._writes % self.maintenance_every:
+                return
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="disk-cache-maintenance", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.maintain()
+
+    def acquire_lease(self, name, ttl):
+        # True for exactly one caller across processes until ttl seconds pass.
+        now = time.time()
+        try:
+            conn = self.connection()
+            with conn:
+                cur = conn.execute(
+                    "INSERT INTO responses (key, value, size, expires_at, stale_until) VALUES (?, ?, 0, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at, "
+                    "stale_until = excluded.stale_until WHERE responses.expires_at <= ?",
+                    (_encode_key("lease", name), zlib.compress(b"null"), now + ttl, now + ttl, now),
+                )
+                return cur.rowcount == 1
+        except sqlite3.Error:
+            return True  # without the shared store, fall back to refreshing locally
+
+    def delete(self, namespace, key):
+        conn = self.connection()
+        with conn:
+            conn.execute("DELETE FROM responses WHERE key=?", (_encode_key(namespace, key),))
+
+    def maintain(self):
+        try:
+            conn = self.connection()
+            with conn:
+                conn.execute("DELETE FROM responses WHERE stale_until <= ?", (time.time(),))
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > self.max_bytes:
+                    # Evict the rows closest to expiry until ~10% under the cap.
+                    excess = total - int(self.max_bytes * 0.9)
+                    conn.execute("""
+                        DELETE FROM responses WHERE key IN (
+                            SELECT key FROM (
+                                SELECT key, size, SUM(size) OVER (ORDER BY stale_until, key) AS running
+                                FROM responses
+                            ) WHERE running - size < ?
+                        )
+                    """, (excess,))
+            # Each step of the pragma frees one page; executescript runs it to completion.
+            conn.executescript("PRAGMA incremental_vacuum;")
+        except sqlite3.Error:
+            pass
+
+    def stats(self):
+        row = self.connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        return {"entries": row[0], "bytes": row[1], "max_bytes": self.max_bytes}
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FetchEngine:
+    """Runs upstream calls on a dedicated asyncio loop thread.
+
+    Sync callers (Dash callbacks) submit work and get concurrent futures back.
+    A semaphore bounds how many calls are in flight at once, and each call has
+    a deadline after which the caller gets TimeoutError instead of waiting on
+    retries and backoff. Calls submitted together run concurrently, so a fan-out
+    costs roughly its slowest call rather than the sum.
+
+    A call that missed its deadline keeps its slot until its thread actually
+    returns, so busy() and new callers see the capacity that is really free.
+    """
+
+    def __init__(self, max_concurrency=16, deadline=15.0):
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self.in_flight = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+        self._loop = None
+        self._pid = None
+        self._worker = threading.local()
+
+    def _ensure_loop(self):
+        # Started on first use, and again in a forked child where the thread is gone.
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            # The calls themselves are blocking (pooled requests.Session); they run
+            # on this executor while the loop only schedules and enforces deadlines.
+            loop.set_default_executor(ThreadPoolExecutor(self.max_concurrency, thread_name_prefix="fetch"))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            threading.Thread(target=loop.run_forever, name="fetch-engine", daemon=True).start()
+            self._loop = loop
+            self._pid = os.getpid()
+            self.in_flight = 0
+            return loop
+
+    async def _call(self, fn, args, deadline):
+        # Waiting for a slot counts against the deadline too.
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + deadline
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), deadline)
+            self.in_flight += 1
+            future = loop.run_in_executor(None, self._invoke, fn, args)
+            future.add_done_callback(self._release)
+            return await asyncio.wait_for(asyncio.shield(future), max(0.0, give_up_at - loop.time()))
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise TimeoutError(f"upstream call exceeded {deadline:.1f}s deadline") from None
+
+    def _release(self, future):
+        # Runs on the loop thread once the executor thread is done with the call.
+        self.in_flight -= 1
+        self._semaphore.release()
+        if not future.cancelled():
+            future.exception()  # consumed here when the caller already gave up
+
+    def _invoke(self, fn, args):
+        self._worker.active = True
+        try:
+            return fn(*args)
+        finally:
+            self._worker.active = False
+
+    def on_worker(self):
+        return getattr(self._worker, "active", False)
+
+    def submit(self, fn, *args, deadline=None):
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._call(fn, args, deadline or self.deadline), loop)
+
+    def run(self, fn, *args, deadline=None):
+        return self.submit(fn, *args, deadline=deadline).result()
+
+    def gather(self, calls, deadline=None):
+        # calls: iterable of (fn, *args). Returns results in order; failures come back
+        # as exception instances so one slow or failed call does not sink the rest.
+        if self.on_worker():
+            # Nested fan-out from a task already holding a slot would wait on
+            # slots that may never free up; run it inline instead.
+            return [self._inline(fn, args) for fn, *args in calls]
+        futures = [self.submit(fn, *args, deadline=deadline) for fn, *args in calls]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    @staticmethod
+    def _inline(fn, args):
+        try:
+            return fn(*args)
+        except Exception as e:
+            return e
+
+    def call(self, fn, *args):
+        # For loaders that may run on the engine already (prefetch, nested fan-out).
+        return fn(*args) if self.on_worker() else self.run(fn, *args)
+
+    def busy(self, threshold=0.75):
+        return self.in_flight >= self.max_concurrency * threshold
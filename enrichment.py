@@ -0,0 +1,92 @@
+import re
+
+import requests
+
+from quota import QuotaExceeded
+
+MAX_IDS_PER_CALL = 50  # videos.list limit for id=
+_DURATION_RE = re.compile(r"P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
+
+
+def format_duration(iso_duration):
+    match = _DURATION_RE.fullmatch(iso_duration or "")
+    if not match or not any(match.groups()):
+        return ""
+    days, hours, minutes, seconds = (int(g or 0) for g in match.groups())
+    hours += days * 24
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def format_views(count):
+    try:
+        n = int(count)
+    except (TypeError, ValueError):
+        return ""
+    if n < 1_000:
+        return f"{n} views"
+    for threshold, suffix in ((1_000, "K"), (1_000_000, "M"), (1_000_000_000, "B")):
+        # The suffix is picked after rounding, so 999,999 reads 1M rather than 1000K.
+        value = f"{n / threshold:.1f}"
+        if float(value) < 1000:
+            break
+    return value.rstrip("0").rstrip(".") + f"{suffix} views"
+
+
+class VideoEnricher:
+    """Adds duration and view counts to result sets via batched videos.list calls.
+
+    Metadata is cached per videoId, so only ids missing from the cache go
+    upstream, at most MAX_IDS_PER_CALL per request.
+    """
+
+    def __init__(self, client, cache, engine=None):
+        self.client = client
+        self.cache = cache
+        self.engine = engine  # optional FetchEngine; batches then go upstream concurrently
+
+    def enrich(self, video_ids, speculative=False, cached_only=False):
+        result = {}
+        missing = []
+        for vid in dict.fromkeys(video_ids):
+            if not vid:
+                continue
+            meta = self.cache.get(vid)
+            if meta is None:
+                missing.append(vid)
+            else:
+                result[vid] = meta
+
+        if cached_only:
+            return result
+        batches = [missing[i:i + MAX_IDS_PER_CALL] for i in range(0, len(missing), MAX_IDS_PER_CALL)]
+        # Even a single batch goes through the engine so it is bound by the upstream
+        # deadline instead of the client's full timeout-and-retry budget.
+        if self.engine is not None and batches:
+            fetched = self.engine.gather((self._fetch_batch, batch, speculative) for batch in batches)
+        else:
+            fetched = [self._fetch_batch(batch, speculative) for batch in batches]
+        for found in fetched:
+            if isinstance(found, dict):
+                result.update(found)
+        return result
+
+    def _fetch_batch(self, batch, speculative=False):
+        try:
+            data = self.client.video_details(batch, speculative=speculative)
+        except (requests.exceptions.RequestException, QuotaExceeded):
+            return {}  # cards render fine without metadata
+        found = {}
+        for item in data.get("items", []):
+            found[item.get("id")] = {
+                "duration": format_duration(item.get("contentDetails", {}).get("duration")),
+                "views": format_views(item.get("statistics", {}).get("viewCount")),
+            }
+        result = {}
+        for vid in batch:
+            # Ids the API no longer returns are cached empty so they are not re-asked.
+            meta = found.get(vid, {})
+            self.cache.set(vid, meta)
+            result[vid] = meta
+        return result
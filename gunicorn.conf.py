@@ -0,0 +1,15 @@
+# gunicorn -c gunicorn.conf.py
+import multiprocessing
+import os
+
+wsgi_app = "app:server"
+bind = os.getenv("BIND", "0.0.0.0:8050")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count() * 2 + 1)))
+# youtube_client sizes its connection pool from this, so keep them in step
+threads = int(os.getenv("GUNICORN_THREADS", "10"))
+
+# Import app.py once in the master and fork workers from it: Dash, the layout and
+# the callback map are built once and shared copy-on-write. This is safe because
+# app import opens no sockets, SQLite files or threads; caches, DB connections,
+# the fetch engine and the trending refresher all start lazily in each worker.
+preload_app = True
@@ -0,0 +1,189 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from db_operations import ThreadConnections
+
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_DB", "video_index.db")
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS videos
+       (rowid INTEGER PRIMARY KEY,
+        video_id TEXT NOT NULL UNIQUE,
+        title TEXT,
+        channel TEXT,
+        description TEXT,
+        thumb TEXT,
+        ts REAL NOT NULL)''',
+    "CREATE INDEX IF NOT EXISTS idx_videos_ts ON videos (ts)",
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5
+       (title, channel, description, content='videos', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2')''',
+    # External-content FTS: keep it in step with the videos table. Re-ingesting
+    # an unchanged video only bumps ts and does not touch the FTS index.
+    '''CREATE TRIGGER IF NOT EXISTS videos_ai AFTER INSERT ON videos BEGIN
+         INSERT INTO videos_fts (rowid, title, channel, description)
+         VALUES (new.rowid, new.title, new.channel, new.description);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS videos_ad AFTER DELETE ON videos BEGIN
+         INSERT INTO videos_fts (videos_fts, rowid, title, channel, description)
+         VALUES ('delete', old.rowid, old.title, old.channel, old.description);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS videos_au AFTER UPDATE OF title, channel, description ON videos
+       WHEN old.title IS NOT new.title OR old.channel IS NOT new.channel
+            OR old.description IS NOT new.description
+       BEGIN
+         INSERT INTO videos_fts (videos_fts, rowid, title, channel, description)
+         VALUES ('delete', old.rowid, old.title, old.channel, old.description);
+         INSERT INTO videos_fts (rowid, title, channel, description)
+         VALUES (new.rowid, new.title, new.channel, new.description);
+       END''',
+)
+
+UPSERT_VIDEO = """
+    INSERT INTO videos (video_id, title, channel, description, thumb, ts)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(video_id) DO UPDATE SET
+        title = excluded.title,
+        channel = excluded.channel,
+        description = excluded.description,
+        thumb = excluded.thumb,
+        ts = excluded.ts
+"""
+
+# Column weights for bm25(): title matches count most, then channel, then description.
+SEARCH_SQL = """
+    SELECT v.video_id, v.title, v.channel, v.description, v.thumb
+    FROM videos_fts JOIN videos v ON v.rowid = videos_fts.rowid
+    WHERE videos_fts MATCH ?
+    ORDER BY bm25(videos_fts, 10.0, 3.0, 1.0)
+    LIMIT ?
+"""
+
+
+def fts_query(query, operator=" "):
+    # Quote every token so user input cannot inject FTS syntax; the last token
+    # is a prefix match so partially typed words still hit.
+    tokens = re.findall(r"\w+", query.lower())
+    if not tokens:
+        return None
+    terms = [f'"{t}"' for t in tokens]
+    terms[-1] += "*"
+    return operator.join(terms)
+
+
+class LocalVideoIndex:
+    """SQLite FTS5 index of every video the app has shown, for quota-free search.
+
+    Ingest is queued and applied by a background thread in batches; the table
+    is trimmed to max_rows by dropping the least recently seen videos.
+    """
+
+    def __init__(self, path=LOCAL_INDEX_PATH, max_rows=2_000_000, batch_size=500, trim_every=200):
+        self.path = path
+        self.max_rows = max_rows
+        self.batch_size = batch_size
+        self.trim_every = trim_every
+        self._connections = ThreadConnections(path, self._create_schema, cached_statements=32)
+        self._queue = deque()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._batches = 0
+
+    def connection(self):
+        return self._connections.get()
+
+    def _create_schema(self, conn):
+        with conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def ingest_async(self, items):
+        rows = []
+        now = time.time()
+        for item in items:
+            vid = item.get("id", "")
+            vid = vid if isinstance(vid, str) else vid.get("videoId", "")
+            if not vid:
+                continue
+            snip = item.get("snippet", {})
+            rows.append((
+                vid,
+                snip.get("title", ""),
+                snip.get("channelTitle", ""),
+                snip.get("description", ""),
+                (snip.get("thumbnails", {}) or {}).get("medium", {}).get("url", ""),
+                now,
+            ))
+        if not rows:
+            return
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="local-index-ingest", daemon=True)
+                self._thread.start()
+            self._queue.extend(rows)
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._queue.popleft())
+                try:
+                    self.ingest(batch)
+                except sqlite3.Error:
+                    pass  # the index is a best-effort fallback
+
+    def ingest(self, rows):
+        conn = self.connection()
+        with conn:
+            conn.executemany(UPSERT_VIDEO, rows)
+        self._batches += 1
+        if self._batches % self.trim_every == 0:
+            self.trim()
+
+    def trim(self):
+        conn = self.connection()
+        with conn:
+            excess = conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0] - self.max_rows
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM videos WHERE rowid IN (SELECT rowid FROM videos ORDER BY ts LIMIT ?)",
+                    (excess,),
+                )
+
+    def search(self, query, limit=20):
+        # Returns items shaped like search.list results. All terms must match;
+        # if that finds nothing, any term may match.
+        results = []
+        for operator in (" ", " OR "):
+            match = fts_query(query, operator)
+            if match is None:
+                return []
+            try:
+                results = self.connection().execute(SEARCH_SQL, (match, limit)).fetchall()
+            except sqlite3.Error:
+                return []
+            if results:
+                break
+        return [
+            {
+                "id": {"videoId": vid},
+                "snippet": {
+                    "title": title,
+                    "channelTitle": channel,
+                    "description": description,
+                    "thumbnails": {"medium": {"url": thumb}},
+                },
+            }
+            for vid, title, channel, description, thumb in results
+        ]
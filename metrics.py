@@ -0,0 +1,156 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; spans a cache hit (sub-ms) to a slow upstream call with retries
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_label_str(self.labels, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observe() is a bisect and two adds under a lock."""
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def timed(self, *labels):
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, *labels)
+            return wrapper
+        return decorator
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == "+Inf" else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_label_str(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class CollectedGauge:
+    """Gauge whose samples are read at scrape time, e.g. from a cache's stats()."""
+
+    def __init__(self, name, help, labels, collect, kind="gauge"):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.collect = collect  # () -> iterable of (label values, value)
+        self.kind = kind
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            samples = list(self.collect())
+        except Exception:
+            samples = []  # a failing source must not break the whole scrape
+        for labels, value in samples:
+            lines.append(f"{self.name}{_label_str(self.labels, labels)} {value}")
+        return lines
+
+
+class Registry:
+    """Process-local metrics rendered in the Prometheus text format.
+
+    Under gunicorn every worker keeps its own registry; scrape each worker
+    (or sum in the query) rather than expecting one global view.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def collected(self, name, help, labels, collect, kind="gauge"):
+        return self._register(CollectedGauge(name, help, labels, collect, kind))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Shared instruments; modules that own other hot paths define theirs next to the code.
+CALLBACK_PHASE = registry.histogram(
+    "callback_phase_seconds", "Time spent per phase of a Dash callback", ("callback", "phase"))
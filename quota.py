@@ -0,0 +1,273 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TZ = ZoneInfo("America/Los_Angeles")  # the Data API quota resets at midnight Pacific
+except Exception:
+    QUOTA_TZ = timezone(timedelta(hours=-8))
+
+# Units per call, from the YouTube Data API v3 quota table
+ENDPOINT_COST = {"search": 100, "videos": 1}
+DEFAULT_COST = 1
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+def quota_day():
+    return datetime.now(QUOTA_TZ).strftime("%Y-%m-%d")
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def available(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def try_take(self, n):
+        if self.available() >= n:
+            self.tokens -= n
+            return True
+        return False
+
+
+class SQLiteLedger:
+    """Daily unit totals and token buckets shared by every worker process through the preferences DB."""
+
+    def __init__(self, store):
+        self.store = store
+        self._ready = False
+
+    def _conn(self):
+        conn = self.store.connection()
+        if not self._ready:
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS quota_usage (day TEXT PRIMARY KEY, units INTEGER NOT NULL)")
+                conn.execute("CREATE TABLE IF NOT EXISTS quota_buckets "
+                             "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+            self._ready = True
+        return conn
+
+    def add(self, day, units):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO quota_usage (day, units) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET units = units + excluded.units",
+                (day, units),
+            )
+            return conn.execute("SELECT units FROM quota_usage WHERE day=?", (day,)).fetchone()[0]
+
+    def charge(self, day, cost, buckets):
+        # buckets: [(name, rate, capacity, floor)]. Debits cost from every bucket
+        # and adds it to the day's total, or does nothing if any bucket would drop
+        # below its floor. Returns (True, None, day total) or (False, bucket name, None).
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")  # read-modify-write across processes
+            names = [b[0] for b in buckets]
+            stored = {
+                name: (tokens, updated)
+                for name, tokens, updated in conn.execute(
+                    f"SELECT name, tokens, updated FROM quota_buckets WHERE name IN ({','.join('?' * len(names))})",
+                    names,
+                )
+            }
+            levels = []
+            for name, rate, capacity, floor in buckets:
+                tokens, updated = stored.get(name, (capacity, now))
+                tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+                if tokens - cost < floor:
+                    return False, name, None
+                levels.append((name, tokens - cost, now))
+            conn.executemany(
+                "INSERT INTO quota_buckets (name, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                levels,
+            )
+            conn.execute(
+                "INSERT INTO quota_usage (day, units) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET units = units + excluded.units",
+                (day, cost),
+            )
+            total = conn.execute("SELECT units FROM quota_usage WHERE day=?", (day,)).fetchone()[0]
+        return True, None, total
+
+    def prune(self, idle=86400):
+        # Buckets idle this long are full again; dropping them loses nothing.
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM quota_buckets WHERE updated < ?", (time.time() - idle,))
+
+    def used(self, day):
+        row = self._conn().execute("SELECT units FROM quota_usage WHERE day=?", (day,)).fetchone()
+        return row[0] if row else 0
+
+
+class QuotaAccountant:
+    """Charges upstream calls against the daily budget and per-user/global token buckets.
+
+    Above speculative_floor of the budget remaining everything goes through;
+    below it speculative work (prefetch, warm-up) is refused; below reserve
+    every upstream call is refused and callers serve from cache only.
+
+    With a ledger the buckets live in the shared DB, so the global burst and
+    each user's rate hold across all worker processes; without one (or if the
+    ledger fails) they are per process.
+    """
+
+    def __init__(self, daily_budget=10000, reserve=0.05, speculative_floor=0.25,
+                 global_rate=None, global_burst=None, user_rate=100 / 30, user_burst=500,
+                 ledger=None, max_users=10000):
+        self.daily_budget = daily_budget
+        self.reserve = reserve
+        self.speculative_floor = speculative_floor
+        self.ledger = ledger
+        self.max_users = max_users
+        # Default pacing: a quarter of the day's budget can go in a burst, then it
+        # refills at 4x the flat rate so a morning peak cannot drain the whole day.
+        self.global_bucket = TokenBucket(
+            global_rate if global_rate is not None else 4 * daily_budget / 86400,
+            global_burst if global_burst is not None else daily_budget * 0.25,
+        )
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self._users = {}
+        self._lock = threading.Lock()
+        self._day = quota_day()
+        self._synced_day = None
+        self._used = 0
+        self.requests = 0
+        self.shed = 0
+
+    def _roll_day(self):
+        day = quota_day()
+        if day != self._day:
+            self._day = day
+            self._used = 0
+            self._users.clear()
+        if self.ledger is not None and self._synced_day != day:
+            # Pick up what other workers (or this one before a restart) already spent.
+            try:
+                self._used = max(self._used, self.ledger.used(day))
+                self.ledger.prune()
+            except Exception:
+                pass
+            self._synced_day = day
+
+    def remaining(self):
+        with self._lock:
+            self._roll_day()
+            return max(0, self.daily_budget - self._used)
+
+    def cache_only(self):
+        return self.remaining() <= self.daily_budget * self.reserve
+
+    def allow_speculative(self):
+        return self.remaining() > self.daily_budget * self.speculative_floor
+
+    def _user_bucket(self, user):
+        bucket = self._users.get(user)
+        if bucket is None:
+            if len(self._users) >= self.max_users:
+                self._users.clear()  # buckets refill quickly; losing them only forgives a burst
+            bucket = self._users[user] = TokenBucket(self.user_rate, self.user_burst)
+        return bucket
+
+    def _take_local(self, cost, user, speculative):
+        # Process-local buckets; caller holds the lock. Returns a refusal reason or None.
+        if speculative and self.global_bucket.available() - cost < self.global_bucket.capacity / 2:
+            return "speculative fetches paused to save quota"
+        if user and self._user_bucket(user).available() < cost:
+            return "too many searches; slow down a little"
+        if not self.global_bucket.try_take(cost):
+            return "upstream rate limit reached; try again shortly"
+        if user:
+            self._user_bucket(user).try_take(cost)
+        self._used += cost
+        return None
+
+    def _take_shared(self, day, cost, user, speculative):
+        # Prefetch may only use the top half of the burst; the rest is for users.
+        bucket = self.global_bucket
+        buckets = [("global", bucket.rate, bucket.capacity, bucket.capacity / 2 if speculative else 0)]
+        if user:
+            buckets.insert(0, (f"user:{user}", self.user_rate, self.user_burst, 0))
+        ok, refused, total = self.ledger.charge(day, cost, buckets)
+        if ok:
+            return None, total
+        if refused != "global":
+            return "too many searches; slow down a little", None
+        if speculative:
+            return "speculative fetches paused to save quota", None
+        return "upstream rate limit reached; try again shortly", None
+
+    def charge(self, endpoint, user=None, speculative=False):
+        cost = ENDPOINT_COST.get(endpoint, DEFAULT_COST)
+        with self._lock:
+            self._roll_day()
+            self.requests += 1
+            remaining = self.daily_budget - self._used
+            shared = False
+            if remaining - cost < self.daily_budget * self.reserve:
+                reason = "daily quota nearly exhausted; serving cached results only"
+            elif speculative and remaining <= self.daily_budget * self.speculative_floor:
+                reason = "speculative fetches paused to save quota"
+            elif self.ledger is None:
+                reason = self._take_local(cost, user, speculative)
+            else:
+                reason, shared = None, True
+            day = self._day
+        if shared:
+            try:
+                reason, total = self._take_shared(day, cost, user, speculative)
+            except Exception:
+                with self._lock:
+                    reason, total = self._take_local(cost, user, speculative), None
+            if reason is None and total is not None:
+                with self._lock:
+                    if day == self._day:
+                        self._used = max(self._used + cost, total)
+        if reason:
+            with self._lock:
+                self.shed += 1
+            raise QuotaExceeded(reason)
+
+    def mark_exhausted(self):
+        # The API said quotaExceeded; trust it over our own count.
+        with self._lock:
+            self._roll_day()
+            delta = self.daily_budget - self._used
+            self._used = self.daily_budget
+            day = self._day
+        if self.ledger is not None and delta > 0:
+            try:
+                self.ledger.add(day, delta)
+            except Exception:
+                pass
+
+    def snapshot(self):
+        remaining = self.remaining()
+        with self._lock:
+            return {
+                "day": self._day,
+                "budget": self.daily_budget,
+                "used": self._used,
+                "remaining": remaining,
+                "cache_only": remaining <= self.daily_budget * self.reserve,
+                "speculative_paused": remaining <= self.daily_budget * self.speculative_floor,
+                "requests": self.requests,
+                "shed": self.shed,
+                "shed_rate": self.shed / self.requests if self.requests else 0.0,
+            }
@@ -0,0 +1,69 @@
+import threading
+import time
+
+
+class _Call:
+    __slots__ = ("event", "value", "error", "done_at")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+        self.done_at = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key onto one execution.
+
+    With linger > 0 a finished result is also handed to callers arriving
+    within that many seconds, which absorbs duplicate UI triggers.
+    """
+
+    def __init__(self, linger=0.0):
+        self.linger = linger
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def _prune(self, now):
+        expired = [k for k, c in self._calls.items() if c.done_at is not None and now - c.done_at >= self.linger]
+        for k in expired:
+            del self._calls[k]
+
+    def do(self, key, fn):
+        return self.do_leader(key, fn)[0]
+
+    def do_leader(self, key, fn):
+        # Returns (value, leader): leader is True only for the caller that ran fn.
+        with self._lock:
+            now = time.monotonic()
+            call = self._calls.get(key)
+            if call is not None and (call.done_at is None or now - call.done_at < self.linger):
+                leader = False
+                self.shared += 1
+            else:
+                if self.linger > 0:
+                    self._prune(now)
+                call = self._calls[key] = _Call()
+                leader = True
+                self.executed += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, False
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                call.done_at = time.monotonic()
+                if (self.linger <= 0 or call.error is not None) and self._calls.get(key) is call:
+                    del self._calls[key]
+            call.event.set()
+        return call.value, True
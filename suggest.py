@@ -0,0 +1,234 @@
+import hashlib
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from cache import normalize_query
+
+
+class PrefixIndex:
+    """Sorted array of normalized queries with popularity counts.
+
+    A lookup bisects to the prefix's range and ranks it by count. Ranges
+    wider than max_scan keys (short, common prefixes) are ranked once and
+    their top_k kept per prefix; counts only grow, so add() keeps those lists
+    exact by re-ranking the key in each cached prefix it falls under.
+    New keys land in a small sorted buffer that is merged into the main
+    array outside the lock, so inserts never stall lookups on a memmove.
+    """
+
+    def __init__(self, max_scan=256, merge_at=4096, top_k=32):
+        self.max_scan = max_scan
+        self.merge_at = merge_at
+        self.top_k = top_k
+        self._keys = []
+        self._pending = []
+        self._counts = {}
+        self._top = {}  # prefix -> its top_k keys, best first
+        self._lock = threading.Lock()
+        self._merging = False
+
+    def __len__(self):
+        return len(self._counts)
+
+    def __contains__(self, query):
+        return normalize_query(query) in self._counts
+
+    def load(self, pairs):
+        # Bulk build from (query, count) pairs; one sort instead of n inserts.
+        counts = {}
+        for query, count in pairs:
+            key = normalize_query(query)
+            if key:
+                counts[key] = counts.get(key, 0) + count
+        with self._lock:
+            for key, count in self._counts.items():
+                counts[key] = counts.get(key, 0) + count
+            self._keys = sorted(counts)
+            self._pending = []
+            self._counts = counts
+            self._top = {}
+
+    def count(self, query):
+        return self._counts.get(normalize_query(query), 0)
+
+    def add(self, query, count=1):
+        key = normalize_query(query)
+        if not key:
+            return
+        with self._lock:
+            if key in self._counts:
+                self._counts[key] += count
+                self._rerank(key)
+                return
+            insort(self._pending, key)
+            self._counts[key] = count
+            self._rerank(key)
+            if len(self._pending) < self.merge_at or self._merging:
+                return
+            self._merging = True
+            keys, pending = self._keys, list(self._pending)
+        # Timsort merges the two sorted runs in linear time; lookups keep
+        # using the old arrays until the swap below.
+        merged = sorted(keys + pending)
+        merged_keys = set(pending)
+        with self._lock:
+            self._keys = merged
+            self._pending = [key for key in self._pending if key not in merged_keys]
+            self._merging = False
+
+    def _rank(self, key):
+        return -self._counts[key], key
+
+    def _rerank(self, key):
+        # Caller holds the lock.
+        rank = self._rank(key)
+        for end in range(1, len(key) + 1):
+            top = self._top.get(key[:end])
+            if top is None:
+                continue
+            if key not in top:
+                if len(top) >= self.top_k and rank >= self._rank(top[-1]):
+                    continue
+                top.append(key)
+            top.sort(key=self._rank)
+            del top[self.top_k:]
+
+    @staticmethod
+    def _range(keys, prefix):
+        # Every key starting with prefix sorts before prefix with its last character bumped.
+        return keys[bisect_left(keys, prefix):bisect_left(keys, prefix[:-1] + chr(ord(prefix[-1]) + 1))]
+
+    def suggest(self, prefix, limit=8):
+        prefix = normalize_query(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            top = self._top.get(prefix) if limit <= self.top_k else None
+            if top is None:
+                matches = self._range(self._keys, prefix) + self._range(self._pending, prefix)
+                if len(matches) <= self.max_scan or limit > self.top_k:
+                    return heapq.nsmallest(limit, matches, key=self._rank)
+                top = self._top[prefix] = heapq.nsmallest(self.top_k, matches, key=self._rank)
+            return top[:limit]
+
+
+class Suggester:
+    """Typeahead over popular queries shared by many users plus each user's own history.
+
+    A query is offered to everyone only once min_users distinct people (signed
+    in or not) have searched it, so one person's one-off search never leaks
+    into other people's suggestions. The global index is capped at max_global
+    queries and rebuilt from the store every rebuild_every seconds on a
+    background thread, which ages out queries whose history has been trimmed
+    away. Queries searched since the last rebuild that the store cannot
+    vouch for (e.g. promoted by anonymous searchers) are carried over.
+    """
+
+    def __init__(self, store, global_seed=100000, max_users=2000, history_depth=50,
+                 min_users=3, max_global=100000, max_candidates=50000, rebuild_every=3600):
+        self.store = store
+        self.global_seed = global_seed
+        self.max_users = max_users
+        self.history_depth = history_depth
+        self.min_users = min_users
+        self.max_global = max_global
+        self.max_candidates = max_candidates
+        self.rebuild_every = rebuild_every
+        self.global_index = PrefixIndex()
+        self._candidates = OrderedDict()  # query -> hashed searchers so far, LRU-bounded
+        self._users = OrderedDict()  # user_id -> PrefixIndex, LRU-bounded
+        self._recent = set()  # global queries searched since the last rebuild
+        self._lock = threading.Lock()
+        self._loaded_at = None
+
+    def _ensure_loaded(self):
+        # Never blocks: lookups use the current index while a thread builds the next.
+        now = time.monotonic()
+        if self._loaded_at is not None and now - self._loaded_at < self.rebuild_every:
+            return
+        with self._lock:
+            if self._loaded_at is not None and now - self._loaded_at < self.rebuild_every:
+                return
+            self._loaded_at = now
+        threading.Thread(target=self._rebuild, name="suggest-rebuild", daemon=True).start()
+
+    def _rebuild(self):
+        index = PrefixIndex()
+        try:
+            index.load(self.store.shared_queries(min(self.global_seed, self.max_global), self.min_users))
+        except Exception:
+            with self._lock:
+                self._loaded_at -= self.rebuild_every - 60  # keep the old index; retry in a minute
+            return
+        with self._lock:
+            old, recent, self._recent = self.global_index, self._recent, set()
+            for query in recent:
+                if query not in index and len(index) < self.max_global:
+                    index.add(query, old.count(query))
+            self.global_index = index
+
+    def _promote(self, query, searcher):
+        # Returns True once query has been searched by min_users distinct searchers.
+        key = normalize_query(query)
+        who = hashlib.blake2b(str(searcher).encode(), digest_size=8).digest()
+        with self._lock:
+            seen = self._candidates.get(key)
+            if seen is None:
+                seen = self._candidates[key] = set()
+                while len(self._candidates) > self.max_candidates:
+                    self._candidates.popitem(last=False)
+            else:
+                self._candidates.move_to_end(key)
+            seen.add(who)
+            if len(seen) < self.min_users:
+                return False
+            del self._candidates[key]
+            return True
+
+    def _user_index(self, user_id, create=True):
+        with self._lock:
+            index = self._users.get(user_id)
+            if index is not None:
+                self._users.move_to_end(user_id)
+                return index
+        if not create:
+            return None
+        index = PrefixIndex()
+        index.load((q, 1) for q in self.store.recent_searches(user_id, self.history_depth))
+        with self._lock:
+            index = self._users.setdefault(user_id, index)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return index
+
+    def record(self, query, user_id=None, client=None):
+        # client identifies anonymous searchers (and is ignored for signed-in ones).
+        self._ensure_loaded()
+        index = self.global_index
+        tracked = query in index
+        if tracked:
+            index.add(query)
+        elif (user_id or client) and len(index) < self.max_global and self._promote(query, user_id or client):
+            index.add(query, self.min_users)
+            tracked = True
+        if tracked:
+            with self._lock:
+                self._recent.add(normalize_query(query))
+        if user_id:
+            # Users not loaded yet pick this up from the store on first lookup.
+            index = self._user_index(user_id, create=False)
+            if index is not None:
+                index.add(query)
+
+    def suggest(self, prefix, user_id=None, limit=8):
+        self._ensure_loaded()
+        results = self._user_index(user_id).suggest(prefix, limit) if user_id else []
+        for query in self.global_index.suggest(prefix, limit):
+            if len(results) >= limit:
+                break
+            if query not in results:
+                results.append(query)
+        return results
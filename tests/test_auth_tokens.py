@@ -0,0 +1,201 @@
+import datetime
+import time
+
+import jwt
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from auth_tokens import CertCache, InvalidToken, TokenVerifier
+
+PROJECT = "demo-project"
+KID = "key-1"
+
+
+def self_signed_cert():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken.test")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return key, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+KEY, CERT_PEM = self_signed_cert()
+
+
+class CountingFetch:
+    def __init__(self, certs=None, max_age=3600):
+        self.certs = {KID: CERT_PEM} if certs is None else certs
+        self.max_age = max_age
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.certs, self.max_age
+
+
+def make_token(kid=KID, key=KEY, algorithm="RS256", **overrides):
+    now = int(time.time())
+    claims = {
+        "aud": PROJECT,
+        "iss": f"https://securetoken.google.com/{PROJECT}",
+        "sub": "uid-123",
+        "email": "user@example.com",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, key, algorithm=algorithm, headers={"kid": kid})
+
+
+def make_verifier(fetch=None):
+    return TokenVerifier(PROJECT, certs=CertCache(fetch=fetch or CountingFetch()))
+
+
+def test_valid_token():
+    claims = make_verifier().verify(make_token())
+    assert claims["sub"] == "uid-123"
+    assert claims["email"] == "user@example.com"
+
+
+def test_repeat_verification_is_cached():
+    fetch = CountingFetch()
+    verifier = make_verifier(fetch)
+    token = make_token()
+    assert verifier.verify(token) == verifier.verify(token)
+    assert verifier._verified.hits == 1
+    assert fetch.calls == 1
+
+
+@pytest.mark.parametrize("overrides", [
+    {"aud": "other-project"},
+    {"iss": "https://securetoken.google.com/other-project"},
+    {"exp": int(time.time()) - 3600, "iat": int(time.time()) - 7200},
+    {"sub": ""},
+])
+def test_rejected_claims(overrides):
+    with pytest.raises(InvalidToken):
+        make_verifier().verify(make_token(**overrides))
+
+
+def test_rejects_missing_token():
+    with pytest.raises(InvalidToken):
+        make_verifier().verify("")
+    with pytest.raises(InvalidToken):
+        make_verifier().verify("not-a-jwt")
+
+
+def test_rejects_non_rs256():
+    token = make_token(key="shared-secret-of-at-least-32-bytes!", algorithm="HS256")
+    with pytest.raises(InvalidToken, match="algorithm"):
+        make_verifier().verify(token)
+
+
+def test_rejects_signature_from_another_key():
+    other_key, _ = self_signed_cert()
+    with pytest.raises(InvalidToken):
+        make_verifier().verify(make_token(key=other_key))
+
+
+def test_unknown_kid():
+    with pytest.raises(InvalidToken, match="unknown signing key"):
+        make_verifier().verify(make_token(kid="forged"))
+
+
+def test_unknown_kids_refetch_at_most_once_per_interval():
+    fetch = CountingFetch()
+    certs = CertCache(fetch=fetch, min_refresh_interval=60)
+    assert certs.get_key(KID) is not None
+    for i in range(20):
+        assert certs.get_key(f"forged-{i}") is None
+    assert fetch.calls == 1
+
+    certs._last_fetch -= 61  # the interval has passed: one more fetch for a new kid
+    assert certs.get_key("forged-again") is None
+    assert certs.get_key("forged-once-more") is None
+    assert fetch.calls == 2
+
+
+def test_rotated_key_is_picked_up():
+    fetch = CountingFetch(certs={"old-key": CERT_PEM})
+    certs = CertCache(fetch=fetch, min_refresh_interval=0)
+    assert certs.get_key(KID) is None
+    fetch.certs = {KID: CERT_PEM}
+    assert certs.get_key(KID) is not None
+    assert fetch.calls == 2
+
+
+def test_expired_certs_are_refetched():
+    fetch = CountingFetch(max_age=0)
+    certs = CertCache(fetch=fetch)
+    certs.get_key(KID)
+    certs.get_key(KID)
+    assert fetch.calls == 2
+
+
+def test_fetch_failure_without_keys():
+    def failing():
+        raise ValueError("bad response")
+
+    with pytest.raises(InvalidToken, match="unavailable"):
+        CertCache(fetch=failing).get_key(KID)
+
+
+def test_fetch_failure_keeps_old_keys():
+    fetch = CountingFetch(max_age=0)
+    certs = CertCache(fetch=fetch)
+    assert certs.get_key(KID) is not None
+
+    def failing():
+        raise ValueError("bad response")
+
+    certs.fetch = failing
+    assert certs.get_key(KID) is not None
+
+
+@pytest.mark.parametrize("token", [123, ["a", "b"], {"token": "x"}, b"bytes"])
+def test_rejects_non_string_token(token):
+    with pytest.raises(InvalidToken):
+        make_verifier().verify(token)
+
+
+def test_failed_fetch_backs_off():
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ValueError("bad response")
+
+    certs = CertCache(fetch=failing, min_refresh_interval=60)
+    for _ in range(5):
+        with pytest.raises(InvalidToken):
+            certs.get_key(KID)
+    assert len(calls) == 1
+
+
+def test_failed_refresh_of_expired_keys_backs_off():
+    fetch = CountingFetch(max_age=0)
+    certs = CertCache(fetch=fetch, min_refresh_interval=60)
+    assert certs.get_key(KID) is not None
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ValueError("bad response")
+
+    certs.fetch = failing
+    for _ in range(5):
+        assert certs.get_key(KID) is not None
+        assert certs.get_key("forged") is None
+    assert len(calls) == 1
@@ -0,0 +1,138 @@
+import threading
+import time
+
+from cache import TTLCache, normalize_query
+
+
+class FakeL2:
+    def __init__(self):
+        self.rows = {}
+
+    def get(self, namespace, key):
+        return self.rows.get((namespace, key))
+
+    def set(self, namespace, key, value, ttl, stale_ttl=0):
+        self.rows[(namespace, key)] = (value, time.time() + ttl)
+
+
+def test_normalize_query():
+    assert normalize_query("  Lofi   HIP hop ") == "lofi hip hop"
+    assert normalize_query(None) == ""
+
+
+def test_get_and_set():
+    cache = TTLCache(maxsize=4, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_entries_expire():
+    cache = TTLCache(ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_get_or_load_calls_loader_once():
+    cache = TTLCache(ttl=60)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return "value"
+
+    assert cache.get_or_load("k", loader) == "value"
+    assert cache.get_or_load("k", loader) == "value"
+    assert len(calls) == 1
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    cache = TTLCache(ttl=60, stale_ttl=60)
+    cache.set("k", "old", ttl=0.05)
+    time.sleep(0.1)
+    refreshed = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        refreshed.set()
+        return "new"
+
+    assert cache.get_or_load("k", loader) == "old"
+    assert cache.get_or_load("k", loader) == "old"
+    assert refreshed.wait(2)
+    time.sleep(0.05)
+    assert cache.get_or_load("k", loader) == "new"
+    assert len(calls) == 1
+    assert cache.stale_hits == 2
+
+
+def test_failed_refresh_keeps_stale_copy():
+    cache = TTLCache(ttl=0.05, stale_ttl=60)
+    cache.set("k", "old")
+    time.sleep(0.1)
+
+    def failing():
+        raise RuntimeError("upstream down")
+
+    assert cache.get_or_load("k", failing) == "old"
+    time.sleep(0.1)
+    assert cache.get_or_load("k", failing) == "old"
+
+
+def test_l2_is_written_through_and_read_on_miss():
+    l2 = FakeL2()
+    first = TTLCache(ttl=60, l2=l2, name="search")
+    first.set("q", ["result"])
+    assert ("search", "q") in l2.rows
+
+    second = TTLCache(ttl=60, l2=l2, name="search")
+    assert second.get_or_load("q", lambda: ["fresh"]) == ["result"]
+    assert second.l2_hits == 1
+    assert second.get("q") == ["result"]
+
+
+def test_stats():
+    cache = TTLCache(maxsize=8, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+    stats = cache.stats()
+    assert stats["size"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_stale_entry_is_revalidated_with_the_refresh_loader():
+    cache = TTLCache(ttl=60, stale_ttl=60)
+    cache.set("k", "old", ttl=0.01)
+    time.sleep(0.05)
+    used = []
+    done = threading.Event()
+
+    def refresh():
+        used.append("refresh")
+        done.set()
+        return "new"
+
+    assert cache.get_or_load("k", lambda: used.append("loader"), refresh=refresh) == "old"
+    assert done.wait(2)
+    assert used == ["refresh"]
@@ -0,0 +1,54 @@
+import os
+import threading
+import time
+
+from disk_cache import DiskCache
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_set_and_get(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.db"))
+    cache.set("search", ("lofi", "IN"), {"items": [1, 2]}, ttl=60)
+    value, expires_at = cache.get("search", ("lofi", "IN"))
+    assert value == {"items": [1, 2]}
+    assert expires_at > time.time()
+    assert cache.get("search", ("jazz", "IN")) is None
+
+
+def test_stale_rows_stop_being_served(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.db"))
+    cache.set("search", "k", 1, ttl=0, stale_ttl=0.05)
+    assert cache.get("search", "k") is not None
+    time.sleep(0.1)
+    assert cache.get("search", "k") is None
+
+
+def test_maintenance_runs_off_the_writing_thread(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.db"), max_bytes=20000, maintenance_every=50)
+    threads = []
+    maintain = cache.maintain
+
+    def recording_maintain():
+        threads.append(threading.current_thread())
+        maintain()
+
+    cache.maintain = recording_maintain
+    for i in range(200):
+        cache.set("n", i, {"x": os.urandom(300).hex()}, ttl=60)
+    assert wait_for(lambda: cache.stats()["bytes"] <= cache.max_bytes)
+    assert threads and threading.current_thread() not in threads
+
+
+def test_lease_is_granted_once_until_it_expires(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first, second = DiskCache(path), DiskCache(path)
+    assert first.acquire_lease("trending:IN", ttl=0.1)
+    assert not second.acquire_lease("trending:IN", ttl=0.1)
+    time.sleep(0.15)
+    assert second.acquire_lease("trending:IN", ttl=0.1)
@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+from engine import FetchEngine
+
+
+def test_run_returns_result():
+    engine = FetchEngine(max_concurrency=2, deadline=1)
+    assert engine.run(lambda x: x * 2, 21) == 42
+
+
+def test_deadline_raises_timeout():
+    engine = FetchEngine(max_concurrency=2, deadline=0.1)
+    with pytest.raises(TimeoutError):
+        engine.run(time.sleep, 0.5)
+    assert engine.timeouts == 1
+
+
+def test_slot_is_held_until_the_thread_finishes():
+    engine = FetchEngine(max_concurrency=2, deadline=0.1)
+    release = threading.Event()
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            engine.run(release.wait, 5)
+    # Both executor threads are still blocked, so the engine must not claim free capacity.
+    assert engine.in_flight == 2
+    assert engine.busy()
+    with pytest.raises(TimeoutError):
+        engine.run(lambda: "instant")
+
+    release.set()
+    deadline = time.monotonic() + 2
+    while engine.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert engine.in_flight == 0
+    assert engine.run(lambda: "instant") == "instant"
+
+
+def test_gather_returns_errors_in_place():
+    engine = FetchEngine(max_concurrency=4, deadline=1)
+
+    def fail():
+        raise ValueError("boom")
+
+    results = engine.gather([(lambda: 1,), (fail,), (lambda: 3,)])
+    assert results[0] == 1
+    assert isinstance(results[1], ValueError)
+    assert results[2] == 3
+
+
+def test_call_runs_inline_on_a_worker():
+    engine = FetchEngine(max_concurrency=1, deadline=1)
+    # With one slot, a nested engine.run would wait on itself until the deadline.
+    assert engine.run(lambda: engine.call(lambda: "nested")) == "nested"
+    assert engine.timeouts == 0
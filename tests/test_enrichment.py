@@ -0,0 +1,33 @@
+import pytest
+
+from enrichment import format_duration, format_views
+
+
+@pytest.mark.parametrize("count, text", [
+    (0, "0 views"),
+    (999, "999 views"),
+    ("1000", "1K views"),
+    (1_050, "1.1K views"),
+    (999_949, "999.9K views"),
+    (999_999, "1M views"),
+    (1_250_000, "1.2M views"),
+    (999_950_000, "1B views"),
+    (2_500_000_000, "2.5B views"),
+    (None, ""),
+    ("n/a", ""),
+])
+def test_format_views(count, text):
+    assert format_views(count) == text
+
+
+@pytest.mark.parametrize("iso, text", [
+    ("PT4M13S", "4:13"),
+    ("PT1H2M3S", "1:02:03"),
+    ("P1DT1H", "25:00:00"),
+    ("PT45S", "0:45"),
+    ("P0D", "0:00"),
+    ("", ""),
+    (None, ""),
+])
+def test_format_duration(iso, text):
+    assert format_duration(iso) == text
@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+from db_operations import PreferenceStore
+from quota import QuotaAccountant, QuotaExceeded, SQLiteLedger, TokenBucket, quota_day
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return SQLiteLedger(PreferenceStore(str(tmp_path / "prefs.db")))
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=0, capacity=3)
+    assert bucket.try_take(2)
+    assert not bucket.try_take(2)
+    assert bucket.try_take(1)
+
+
+def test_charges_count_against_the_budget():
+    quota = QuotaAccountant(daily_budget=1000, reserve=0, global_burst=1000)
+    quota.charge("search")
+    quota.charge("videos")
+    assert quota.remaining() == 899
+    assert quota.snapshot()["requests"] == 2
+
+
+def test_reserve_leaves_cache_only():
+    quota = QuotaAccountant(daily_budget=1000, reserve=0.5, global_burst=1000)
+    for _ in range(5):
+        quota.charge("search")
+    assert quota.cache_only()
+    with pytest.raises(QuotaExceeded, match="cached results only"):
+        quota.charge("search")
+    assert quota.snapshot()["shed"] == 1
+
+
+def test_speculative_floor():
+    quota = QuotaAccountant(daily_budget=1000, reserve=0, speculative_floor=0.5, global_burst=1000)
+    quota.charge("search", speculative=True)
+    for _ in range(4):
+        quota.charge("search")
+    assert not quota.allow_speculative()
+    with pytest.raises(QuotaExceeded, match="speculative"):
+        quota.charge("search", speculative=True)
+    quota.charge("search")  # users still get through
+
+
+def test_per_user_bucket():
+    quota = QuotaAccountant(daily_budget=10 ** 6, user_rate=0, user_burst=200)
+    quota.charge("search", user="a")
+    quota.charge("search", user="a")
+    with pytest.raises(QuotaExceeded, match="slow down"):
+        quota.charge("search", user="a")
+    quota.charge("search", user="b")
+
+
+def test_global_bucket():
+    quota = QuotaAccountant(daily_budget=10 ** 6, global_rate=0, global_burst=200)
+    quota.charge("search")
+    quota.charge("search")
+    with pytest.raises(QuotaExceeded, match="rate limit"):
+        quota.charge("search")
+
+
+def test_mark_exhausted():
+    quota = QuotaAccountant(daily_budget=1000)
+    quota.mark_exhausted()
+    assert quota.remaining() == 0
+    with pytest.raises(QuotaExceeded):
+        quota.charge("videos")
+
+
+def test_ledger_shares_buckets_across_accountants(ledger):
+    # Two accountants on one ledger stand in for two worker processes.
+    workers = [QuotaAccountant(daily_budget=10 ** 6, global_rate=0, global_burst=300, ledger=ledger)
+               for _ in range(2)]
+    workers[0].charge("search")
+    workers[1].charge("search")
+    workers[0].charge("search")
+    with pytest.raises(QuotaExceeded, match="rate limit"):
+        workers[1].charge("search")
+    assert ledger.used(quota_day()) == 300
+
+
+def test_ledger_shares_user_buckets(ledger):
+    workers = [QuotaAccountant(daily_budget=10 ** 6, user_rate=0, user_burst=100, ledger=ledger)
+               for _ in range(2)]
+    workers[0].charge("search", user="a")
+    with pytest.raises(QuotaExceeded, match="slow down"):
+        workers[1].charge("search", user="a")
+
+
+def test_ledger_daily_total_is_picked_up(ledger):
+    ledger.add(quota_day(), 900)
+    quota = QuotaAccountant(daily_budget=1000, ledger=ledger)
+    assert quota.remaining() == 100
+
+
+def test_concurrent_shared_charges_never_overspend(tmp_path):
+    path = str(tmp_path / "prefs.db")
+    workers = [QuotaAccountant(daily_budget=10 ** 6, global_rate=0, global_burst=2500,
+                               ledger=SQLiteLedger(PreferenceStore(path)))
+               for _ in range(4)]
+    admitted = []
+    lock = threading.Lock()
+
+    def run(quota):
+        for _ in range(20):
+            try:
+                quota.charge("search")
+            except QuotaExceeded:
+                continue
+            with lock:
+                admitted.append(1)
+
+    threads = [threading.Thread(target=run, args=(q,)) for q in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(admitted) == 25
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def run_concurrently(n, fn):
+    results = [None] * n
+    errors = [None] * n
+
+    def target(i):
+        try:
+            results[i] = fn()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    def do():
+        return flight.do("key", slow)
+
+    threading.Timer(0.2, release.set).start()
+    results, errors = run_concurrently(8, do)
+    assert results == ["value"] * 8
+    assert errors == [None] * 8
+    assert len(calls) == 1
+    assert flight.executed == 1
+    assert flight.shared == 7
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.executed == 2
+
+
+def test_without_linger_a_finished_call_is_not_reused():
+    flight = SingleFlight()
+    flight.do("key", lambda: 1)
+    assert flight.do("key", lambda: 2) == 2
+    assert flight._calls == {}
+
+
+def test_error_reaches_every_waiter_and_is_not_kept():
+    flight = SingleFlight(linger=10)
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    threading.Timer(0.2, release.set).start()
+    results, errors = run_concurrently(4, lambda: flight.do("key", failing))
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert flight.executed == 1
+    # A failure is never lingered on: the next caller retries.
+    assert flight.do("key", lambda: "ok") == "ok"
+
+
+def test_linger_reuses_a_recent_result():
+    flight = SingleFlight(linger=0.2)
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 1
+    time.sleep(0.25)
+    assert flight.do("key", lambda: 3) == 3
+    assert flight.executed == 2
+    assert flight.shared == 1
+
+
+def test_linger_prunes_old_results():
+    flight = SingleFlight(linger=0.05)
+    for i in range(10):
+        flight.do(i, lambda: i)
+    time.sleep(0.1)
+    flight.do("fresh", lambda: None)
+    assert list(flight._calls) == ["fresh"]
+
+
+def test_base_exception_propagates():
+    flight = SingleFlight()
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        flight.do("key", interrupted)
+    assert flight._calls == {}
+
+
+def test_do_leader_reports_who_ran_the_call():
+    flight = SingleFlight(linger=10)
+    assert flight.do_leader("key", lambda: 1) == (1, True)
+    assert flight.do_leader("key", lambda: 2) == (1, False)
@@ -0,0 +1,104 @@
+import threading
+import time
+
+from suggest import PrefixIndex, Suggester
+
+
+class FakeStore:
+    def __init__(self, shared=(), history=None):
+        self.shared = list(shared)
+        self.history = history or {}
+        self.loads = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def shared_queries(self, limit=10, min_users=3):
+        self.release.wait(5)
+        self.loads += 1
+        return self.shared[:limit]
+
+    def recent_searches(self, user_id, limit=10, distinct=False):
+        return self.history.get(user_id, [])[:limit]
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_prefix_index_ranks_by_count():
+    index = PrefixIndex()
+    index.load([("lofi beats", 5), ("lofi jazz", 9), ("lo-fi", 1), ("jazz", 100)])
+    assert index.suggest("lo") == ["lofi jazz", "lofi beats", "lo-fi"]
+    assert index.suggest("LOFI  j") == ["lofi jazz"]
+    assert index.suggest("") == []
+
+
+def test_most_popular_match_wins_in_a_wide_range():
+    index = PrefixIndex()
+    index.load([(f"a{i:04d}", 1) for i in range(1000)] + [("azure tutorial", 10000)])
+    assert index.suggest("a", 3) == ["azure tutorial", "a0000", "a0001"]
+
+
+def test_cached_top_lists_follow_new_counts():
+    index = PrefixIndex(max_scan=4, top_k=4, merge_at=8)
+    index.load([(f"q{i:02d}", 10) for i in range(20)])
+    assert index.suggest("q", 2) == ["q00", "q01"]
+    index.add("q19", 5)
+    index.add("q new", 50)
+    assert index.suggest("q", 3) == ["q new", "q19", "q00"]
+    assert index.suggest("q", 10)[:3] == ["q new", "q19", "q00"]  # wider than top_k: ranked fresh
+
+
+def test_query_is_shared_only_after_min_users():
+    suggester = Suggester(FakeStore(), min_users=3)
+    suggester.record("private thing", client="1.1.1.1|a")
+    suggester.record("private thing", client="1.1.1.1|a")
+    suggester.record("private thing", client="2.2.2.2|b")
+    assert suggester.suggest("priv") == []
+    suggester.record("private thing", user_id="c@example.com")
+    assert suggester.suggest("priv") == ["private thing"]
+
+
+def test_user_history_comes_first():
+    store = FakeStore(shared=[("lofi jazz", 50)], history={"u@example.com": ["lofi study"]})
+    suggester = Suggester(store)
+    suggester.suggest("x")  # the first lookup starts the load
+    assert wait_for(lambda: "lofi jazz" in suggester.global_index)
+    assert suggester.suggest("lofi", user_id="u@example.com") == ["lofi study", "lofi jazz"]
+    assert suggester.suggest("lofi") == ["lofi jazz"]
+
+
+def test_rebuild_runs_in_the_background():
+    store = FakeStore(shared=[("jazz", 10)])
+    store.release.clear()
+    suggester = Suggester(store)
+    start = time.perf_counter()
+    assert suggester.suggest("ja") == []  # the first load must not block the lookup
+    assert time.perf_counter() - start < 0.5
+    store.release.set()
+    assert wait_for(lambda: suggester.suggest("ja") == ["jazz"])
+
+
+def test_rebuild_keeps_anonymous_promotions():
+    store = FakeStore(shared=[("jazz", 10)])
+    suggester = Suggester(store, min_users=2, rebuild_every=3600)
+    suggester.suggest("x")
+    assert wait_for(lambda: store.loads == 1)
+    suggester.record("anon query", client="a")
+    suggester.record("anon query", client="b")
+    assert suggester.suggest("anon") == ["anon query"]
+
+    suggester._loaded_at -= 3600
+    suggester.suggest("x")  # due: starts the rebuild
+    assert wait_for(lambda: store.loads == 2)
+    assert wait_for(lambda: suggester.suggest("anon") == ["anon query"])
+    assert suggester.suggest("ja") == ["jazz"]
+
+    # Not searched again during the next period: it ages out.
+    suggester._loaded_at -= 3600
+    suggester.suggest("x")
+    assert wait_for(lambda: store.loads == 3)
+    assert wait_for(lambda: suggester.suggest("anon") == [])
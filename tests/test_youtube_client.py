@@ -0,0 +1,99 @@
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from benchmarks import stub_server
+from youtube_client import SEARCH_FIELDS, YouTubeClient
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server = stub_server.start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def client(stub):
+    stub.scripted.clear()
+    stub.hits.clear()
+    return YouTubeClient("test-key", base_url=stub_server.base_url(stub), backoff=0.01, max_backoff=1.0)
+
+
+def test_search_sends_partial_response_fields(stub, client):
+    data = client.search("lofi beats", max_results=5)
+    assert len(data["items"]) == 5
+    endpoint, params, _ = stub.last_request
+    assert endpoint == "search"
+    assert params["q"] == "lofi beats"
+    assert params["fields"] == SEARCH_FIELDS
+    assert params["key"] == "test-key"
+    assert "regionCode" not in params
+
+
+def test_responses_are_gzipped(stub, client):
+    resp = client.get("search", {"part": "snippet", "q": "jazz"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.json()["items"]
+    assert "gzip" in stub.last_request[2]["Accept-Encoding"]
+
+
+def test_retries_transient_errors(stub, client):
+    stub.scripted.extend([(503, ()), (500, ())])
+    data = client.search("retry me")
+    assert data["items"]
+    assert stub.hits["search"] == 3
+
+
+def test_does_not_retry_client_errors(stub, client):
+    stub.scripted.append((400, ()))
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.search("bad request")
+    assert stub.hits["search"] == 1
+
+
+def test_gives_up_after_max_retries(stub, client):
+    stub.scripted.extend([(503, ())] * (client.max_retries + 1))
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.search("always down")
+    assert stub.hits["search"] == client.max_retries + 1
+
+
+def test_honours_retry_after(stub, client):
+    stub.scripted.append((429, [("Retry-After", "0.3")]))
+    start = time.perf_counter()
+    client.search("slow down")
+    assert time.perf_counter() - start >= 0.3
+    assert stub.hits["search"] == 2
+
+
+def test_retry_after_is_capped_by_max_backoff(stub, client):
+    stub.scripted.append((503, [("Retry-After", "3600")]))
+    start = time.perf_counter()
+    client.search("come back tomorrow")
+    assert time.perf_counter() - start < client.max_backoff + 0.5
+
+
+def test_connection_errors_are_retried_then_raised():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]  # nothing listens here once the socket closes
+    client = YouTubeClient("test-key", base_url=f"http://127.0.0.1:{port}", max_retries=2, backoff=0.01)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.search("unreachable")
+
+
+def test_concurrent_identical_requests_share_one_round_trip(stub, client):
+    stub.latency_ms = 200
+    try:
+        threads = [threading.Thread(target=client.search, args=("same query",)) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        stub.latency_ms = 0
+    assert stub.hits["search"] == 1
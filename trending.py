@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+
+
+class TrendingFeed:
+    """Keeps a warm mostPopular snapshot per region, refreshed by a background thread."""
+
+    def __init__(self, client, regions, interval=300, max_results=20, store=None, on_refresh=None):
+        self.client = client
+        self.on_refresh = on_refresh  # called with each region's items from the refresher thread
+        self.store = store  # optional DiskCache so snapshots survive restarts and are shared
+        self.regions = list(regions)
+        self.interval = interval
+        self.max_results = max_results
+        self._snapshots = {}  # region -> {"items", "etag", "fetched_at"}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        # Cheap enough to call per request; a forked worker starts its own thread.
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="trending-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            for region in list(self.regions):
+                try:
+                    snapshot = self.refresh(region)
+                    if self.on_refresh is not None and snapshot:
+                        self.on_refresh(snapshot["items"])
+                except Exception:
+                    pass  # keep the previous snapshot; retry next cycle
+            self._stop.wait(self.interval)
+
+    def _snapshot(self, region):
+        with self._lock:
+            snapshot = self._snapshots.get(region)
+        if snapshot is None and self.store is not None:
+            found = self.store.get("trending", region)
+            if found is not None:
+                snapshot = found[0]
+                with self._lock:
+                    snapshot = self._snapshots.setdefault(region, snapshot)
+        return snapshot
+
+    def refresh(self, region, lease=60):
+        if self.store is not None:
+            # Every worker runs this loop; only one of them should go upstream per
+            # interval. A snapshot another worker stored recently is simply adopted.
+            found = self.store.get("trending", region)
+            if found is not None and found[1] > time.time():
+                with self._lock:
+                    self._snapshots[region] = found[0]
+                return found[0]
+            if not self.store.acquire_lease(f"trending:{region}", lease):
+                current = self._snapshot(region)
+                if current is not None:
+                    return current
+        current = self._snapshot(region)
+        resp = self.client.trending(region, self.max_results, etag=current and current.get("etag"))
+        if resp.status_code == 304 and current:
+            with self._lock:
+                current["fetched_at"] = time.time()
+            if self.store is not None:
+                self.store.set("trending", region, current, self.interval, stale_ttl=86400)
+            return current
+        resp.raise_for_status()
+        data = resp.json()
+        snapshot = {
+            "items": data.get("items", []),
+            "next_page_token": data.get("nextPageToken"),
+            "etag": resp.headers.get("ETag") or data.get("etag"),
+            "fetched_at": time.time(),
+        }
+        with self._lock:
+            self._snapshots[region] = snapshot
+        if self.store is not None:
+            # Kept well past the refresh interval: a stale feed beats an empty Home page.
+            self.store.set("trending", region, snapshot, self.interval, stale_ttl=86400)
+        return snapshot
+
+    def cached(self, region):
+        # The current snapshot, or None; never goes upstream.
+        return self._snapshot(region)
+
+    def get(self, region):
+        # Returns the first-page snapshot: {"items", "next_page_token", "etag", "fetched_at"}.
+        snapshot = self._snapshot(region)
+        if snapshot is not None:
+            return snapshot
+        # Cold start or unconfigured region: fetch once inline, then keep it warm.
+        if region not in self.regions:
+            self.regions.append(region)
+        return self.refresh(region)
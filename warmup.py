@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import TTLCache
+from quota import QuotaExceeded
+
+
+class SessionWarmer:
+    """Prefetches a signed-in user's recent searches so repeating one is a cache hit.
+
+    Warm-ups run on a small pool of their own, one user at a time per worker,
+    and only while can_run() says there is spare quota and upstream capacity;
+    otherwise they wait, and give up after max_wait. Each user is warmed at
+    most once per cooldown, however often they sign in or refresh their token.
+    """
+
+    def __init__(self, history, fetch, can_run, depth=5, workers=2, max_pending=50,
+                 cooldown=900, max_wait=30.0, poll=1.0, max_users=10000):
+        self.history = history  # (user_id, limit) -> newest distinct queries first
+        self.fetch = fetch      # (query) -> loads that query's results into the caches
+        self.can_run = can_run  # () -> False when prefetching should back off
+        self.depth = depth
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_wait = max_wait
+        self.poll = poll
+        self._warmed = TTLCache(maxsize=max_users, ttl=cooldown, name="warmup")
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._pending = 0
+        self.queries_warmed = 0
+        self.skipped = 0
+
+    def _executor(self):
+        # Caller holds the lock. Created on first use, and again after a fork.
+        if self._pool is None or self._pid != os.getpid():
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="warmup")
+            self._pid = os.getpid()
+            self._pending = 0
+        return self._pool
+
+    def warm(self, user_id):
+        if not user_id or self.depth <= 0:
+            return False
+        with self._lock:
+            if self._warmed.get(user_id) is not None or self._pending >= self.max_pending:
+                return False
+            self._warmed.set(user_id, True)
+            executor = self._executor()
+            self._pending += 1
+        executor.submit(self._run, user_id)
+        return True
+
+    def _wait_for_capacity(self):
+        waited = 0.0
+        while not self.can_run():
+            if waited >= self.max_wait:
+                return False
+            time.sleep(self.poll)
+            waited += self.poll
+        return True
+
+    def _run(self, user_id):
+        try:
+            for query in self.history(user_id, self.depth):
+                if not self._wait_for_capacity():
+                    self.skipped += 1
+                    return
+                try:
+                    self.fetch(query)
+                    self.queries_warmed += 1
+                except QuotaExceeded:
+                    self.skipped += 1
+                    return  # speculative budget is gone; the rest would be refused too
+                except Exception:
+                    continue  # one failed query should not stop the rest
+        except Exception:
+            pass  # history lookup failed; warm-up is best-effort
+        finally:
+            with self._lock:
+                self._pending -= 1
@@ -0,0 +1,151 @@
+import os
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import registry
+from singleflight import SingleFlight
+
+API_BASE_URL = os.getenv("YOUTUBE_API_BASE_URL", "https://www.googleapis.com/youtube/v3")
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Partial-response projections: only the snippet fields the result cards render
+SNIPPET_FIELDS = "snippet(title,description,channelTitle,thumbnails/medium/url)"
+SEARCH_FIELDS = f"nextPageToken,items(id/videoId,{SNIPPET_FIELDS})"
+TRENDING_FIELDS = f"etag,nextPageToken,items(id,{SNIPPET_FIELDS})"
+DETAILS_FIELDS = "items(id,contentDetails/duration,statistics/viewCount)"
+
+UPSTREAM_LATENCY = registry.histogram(
+    "upstream_request_seconds", "YouTube Data API round trips per attempt", ("endpoint", "status"))
+UPSTREAM_DECODE = registry.histogram(
+    "upstream_decode_seconds", "JSON decode time of YouTube Data API responses", ("endpoint",))
+
+
+def default_pool_size():
+    # One keep-alive connection per callback thread is enough; extra ones sit idle.
+    return int(os.getenv("YOUTUBE_POOL_SIZE") or os.getenv("GUNICORN_THREADS") or 10)
+
+
+class YouTubeClient:
+    """Pooled, retrying client for the YouTube Data API v3."""
+
+    def __init__(self, api_key, base_url=API_BASE_URL, pool_size=None, max_retries=3,
+                 backoff=0.25, max_backoff=4.0, timeout=10, quota=None, deadline=None):
+        self.api_key = api_key
+        self.quota = quota  # optional QuotaAccountant charged before every attempt
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.deadline = deadline  # optional cap on one call's attempts, retries and backoff
+        self.flight = SingleFlight()
+
+        pool_size = pool_size or default_pool_size()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # The API only gzips responses when the User-Agent also mentions gzip.
+        self.session.headers.update({
+            "Accept-Encoding": "gzip",
+            "User-Agent": "youtube-focus/1.0 (gzip)",
+        })
+
+    def _retry_delay(self, attempt, resp=None):
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            # Full jitter: spread retries from many workers across the window.
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        return min(delay, self.max_backoff)
+
+    def get(self, endpoint, params, headers=None, timeout=None, user=None, speculative=False):
+        url = f"{self.base_url}/{endpoint}"
+        params = dict(params, key=self.api_key)
+        give_up_at = time.monotonic() + self.deadline if self.deadline else None
+        for attempt in range(self.max_retries + 1):
+            attempt_timeout = timeout or self.timeout
+            if give_up_at is not None:
+                attempt_timeout = max(0.1, min(attempt_timeout, give_up_at - time.monotonic()))
+            if self.quota is not None:
+                self.quota.charge(endpoint, user=user, speculative=speculative)
+            resp = None
+            start = time.perf_counter()
+            try:
+                resp = self.session.get(url, params=params, headers=headers, timeout=attempt_timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                UPSTREAM_LATENCY.observe(time.perf_counter() - start, endpoint, type(e).__name__)
+                if attempt == self.max_retries:
+                    raise
+                error = e
+            else:
+                UPSTREAM_LATENCY.observe(time.perf_counter() - start, endpoint, str(resp.status_code))
+                if resp.status_code == 403 and self.quota is not None and b"quotaExceeded" in resp.content:
+                    self.quota.mark_exhausted()
+                if resp.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return resp
+            delay = self._retry_delay(attempt, resp)
+            if give_up_at is not None and time.monotonic() + delay >= give_up_at:
+                # No time left for another attempt: hand back what the last one got.
+                if resp is not None:
+                    return resp
+                raise error
+            time.sleep(delay)
+
+    def get_json(self, endpoint, params, timeout=None, user=None, speculative=False):
+        # Concurrent identical requests share one upstream round trip.
+        def fetch():
+            resp = self.get(endpoint, params, timeout=timeout, user=user, speculative=speculative)
+            resp.raise_for_status()
+            with UPSTREAM_DECODE.time(endpoint):
+                return resp.json()
+
+        return self.flight.do((endpoint, tuple(sorted(params.items()))), fetch)
+
+    def search(self, query, max_results=20, page_token=None, timeout=15,
+               user=None, speculative=False):
+        params = {
+            "part": "snippet",
+            "q": query,
+            "type": "video",
+            "maxResults": max_results,
+            "fields": SEARCH_FIELDS,
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        return self.get_json("search", params, timeout=timeout, user=user, speculative=speculative)
+
+    def trending(self, region, max_results=20, etag=None, timeout=12):
+        params = {
+            "part": "snippet",
+            "chart": "mostPopular",
+            "maxResults": max_results,
+            "regionCode": region,
+            "fields": TRENDING_FIELDS,
+        }
+        headers = {"If-None-Match": etag} if etag else None
+        return self.get("videos", params, headers=headers, timeout=timeout)
+
+    def trending_page(self, region, page_token, max_results=20, timeout=12, speculative=False):
+        params = {
+            "part": "snippet",
+            "chart": "mostPopular",
+            "maxResults": max_results,
+            "regionCode": region,
+            "pageToken": page_token,
+            "fields": TRENDING_FIELDS,
+        }
+        return self.get_json("videos", params, timeout=timeout, speculative=speculative)
+
+    def video_details(self, video_ids, timeout=10, speculative=False):
+        params = {
+            "part": "contentDetails,statistics",
+            "id": ",".join(video_ids),
+            "maxResults": len(video_ids),
+            "fields": DETAILS_FIELDS,
+        }
+        return self.get_json("videos", params, timeout=timeout, speculative=speculative)